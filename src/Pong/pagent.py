@@ -1,16 +1,16 @@
 # Author: Shiva Verma
 
 from ppaddle import Paddle
+from pong_sim import BatchPongSim
+from replay_buffer import ReplayBuffer
 
 import random
 import numpy as np
 from keras import Sequential
-from collections import deque
 from keras.layers import Dense
 import matplotlib.pyplot as plt
 from keras.optimizers import Adam
 
-env = Paddle()
 np.random.seed(0)
 
 
@@ -28,7 +28,7 @@ class DQN:
         self.epsilon_min = .01
         self.epsilon_decay = .995
         self.learning_rate = 0.001
-        self.memory = deque(maxlen=100000)
+        self.memory = ReplayBuffer(100000, state_space)
         self.model = self.build_model()
 
     def build_model(self):
@@ -41,7 +41,7 @@ class DQN:
         return model
 
     def remember(self, state, action, reward, next_state, done):
-        self.memory.append((state, action, reward, next_state, done))
+        self.memory.add(state, action, reward, next_state, done)
 
     def act(self, state):
 
@@ -50,33 +50,32 @@ class DQN:
         act_values = self.model.predict(state)
         return np.argmax(act_values[0])
 
+    def act_batch(self, states):
+
+        # one prediction for every game, then epsilon greedy per game
+        actions = np.argmax(self.model.predict_on_batch(states), axis=1)
+        explore = np.random.rand(len(states)) <= self.epsilon
+        actions[explore] = np.random.randint(self.action_space, size=np.count_nonzero(explore))
+        return actions
+
     def replay(self):
 
         if len(self.memory) < self.batch_size:
             return
 
-        minibatch = random.sample(self.memory, self.batch_size)
-        states = np.array([i[0] for i in minibatch])
-        actions = np.array([i[1] for i in minibatch])
-        rewards = np.array([i[2] for i in minibatch])
-        next_states = np.array([i[3] for i in minibatch])
-        dones = np.array([i[4] for i in minibatch])
-
-        states = np.squeeze(states)
-        next_states = np.squeeze(next_states)
+        states, actions, rewards, next_states, dones = self.memory.sample(self.batch_size)
 
         targets = rewards + self.gamma*(np.amax(self.model.predict_on_batch(next_states), axis=1))*(1-dones)
         targets_full = self.model.predict_on_batch(states)
 
-        ind = np.array([i for i in range(self.batch_size)])
-        targets_full[[ind], [actions]] = targets
+        targets_full[np.arange(self.batch_size), actions] = targets
 
         self.model.fit(states, targets_full, epochs=1, verbose=0)
         if self.epsilon > self.epsilon_min:
             self.epsilon *= self.epsilon_decay
 
 
-def train_dqn(episode):
+def train_dqn(episode, render=False):
 
     loss = []
 
@@ -84,6 +83,8 @@ def train_dqn(episode):
     state_space = 5
     max_steps = 1000
 
+    # turtle only draws the game, training runs headless unless asked to render
+    env = Paddle(render=render)
     agent = DQN(action_space, state_space)
     for e in range(episode):
         state = env.reset()
@@ -104,6 +105,41 @@ def train_dqn(episode):
     return loss
 
 
+def train_dqn_batch(episode, num_envs=32):
+
+    """ Like train_dqn, with num_envs headless games stepped together and one prediction per step for all of them """
+    loss = []
+
+    action_space = 3
+    state_space = 5
+    max_steps = 1000
+
+    env = BatchPongSim(num_envs, dx=3, dy=-3, hit_reward=3, miss_reward=-3, move_penalty=.1)
+    agent = DQN(action_space, state_space)
+    states = env.reset()
+    scores = np.zeros(num_envs)
+    steps = np.zeros(num_envs, dtype=int)
+    while len(loss) < episode:
+        actions = agent.act_batch(states)
+        rewards, next_states, dones = env.step(actions)
+        scores += rewards
+        steps += 1
+        agent.memory.add_batch(states, actions, rewards, next_states, dones)
+        agent.replay()
+
+        # games also end after max_steps, those are reset here (finished ones already were by the env)
+        ended = dones | (steps >= max_steps)
+        for j in np.flatnonzero(ended):
+            loss.append(scores[j])
+            print("episode: {}/{}, score: {}".format(len(loss), episode, scores[j]))
+        scores[ended] = 0
+        steps[ended] = 0
+        if (ended & ~dones).any():
+            next_states = env.reset(ended & ~dones)
+        states = next_states
+    return loss[:episode]
+
+
 if __name__ == '__main__':
 
     ep = 100
@@ -0,0 +1,218 @@
+import numpy as np
+
+
+# 0 move left
+# 1 do nothing
+# 2 move right
+
+# field and paddle geometry, in turtle coordinates
+WALL = 290
+PADDLE_Y = -275
+PADDLE_LIMIT = 225
+PADDLE_STEP = 20
+PADDLE_HALF_WIDTH = 55
+HIT_Y = -250
+BALL_START = (0, 100)
+
+
+class PongSim:
+    """ Headless pong physics, the same game and reset()/step() contract as the turtle Paddle """
+    def __init__(self, dx=1, dy=1, hit_reward=5, miss_reward=-3, move_penalty=.075):
+        self.dx, self.dy = dx, dy
+        self.hit_reward = hit_reward
+        self.miss_reward = miss_reward
+        self.move_penalty = move_penalty
+
+        self.paddle_x = 0
+        self.ball_x, self.ball_y = BALL_START
+        self.ball_dx = dx             # ball horizontal velocity
+        self.ball_dy = dy             # ball vertical velocity
+
+        self.done = False
+        self.reward = 0
+        self.hit, self.miss = 0, 0
+
+    def paddle_right(self):
+        if self.paddle_x < PADDLE_LIMIT:
+            self.paddle_x += PADDLE_STEP
+
+    def paddle_left(self):
+        if self.paddle_x > -PADDLE_LIMIT:
+            self.paddle_x -= PADDLE_STEP
+
+    def run_frame(self):
+        # Ball moving
+        self.ball_x += self.ball_dx
+        self.ball_y += self.ball_dy
+
+        # Ball bounce
+        if self.ball_x > WALL:
+            self.ball_x = WALL
+            self.ball_dx *= -1
+
+        if self.ball_x < -WALL:
+            self.ball_x = -WALL
+            self.ball_dx *= -1
+
+        if self.ball_y > WALL:
+            self.ball_y = WALL
+            self.ball_dy *= -1
+
+        # Ball miss
+        if self.ball_y < -WALL:
+            self.miss += 1
+            self.ball_x, self.ball_y = BALL_START
+            self.reward += self.miss_reward
+            self.done = True
+
+        # Ball hit
+        if abs(self.ball_y - HIT_Y) < 2 and abs(self.paddle_x - self.ball_x) < PADDLE_HALF_WIDTH:
+            self.ball_dy *= -1
+            self.hit += 1
+            self.reward += self.hit_reward
+
+    def state(self):
+        return [self.paddle_x*0.01, self.ball_x*0.01, self.ball_y*0.01, self.ball_dx, self.ball_dy]
+
+    def reset(self):
+        self.paddle_x = 0
+        self.ball_x, self.ball_y = BALL_START
+        return self.state()
+
+    def step(self, action):
+        self.reward = 0
+        self.done = False
+
+        if action == 0:
+            self.paddle_left()
+            self.reward -= self.move_penalty
+
+        if action == 2:
+            self.paddle_right()
+            self.reward -= self.move_penalty
+
+        self.run_frame()
+
+        return self.reward, self.state(), self.done
+
+
+class BatchPongSim:
+    """
+    B pong games stepped together, every game is a row of the state arrays.
+    step takes one action per game and returns (rewards, states, dones) like PongSim, as arrays;
+    finished games are reset inside step, so the returned state of a finished game is already its next start.
+    """
+    def __init__(self, num_envs, dx=1, dy=1, hit_reward=5, miss_reward=-3, move_penalty=.075):
+        self.num_envs = num_envs
+        self.hit_reward = hit_reward
+        self.miss_reward = miss_reward
+        self.move_penalty = move_penalty
+
+        self.paddle_x = np.zeros(num_envs)
+        self.ball_x = np.full(num_envs, float(BALL_START[0]))
+        self.ball_y = np.full(num_envs, float(BALL_START[1]))
+        self.ball_dx = np.full(num_envs, float(dx))
+        self.ball_dy = np.full(num_envs, float(dy))
+
+        self.hit = np.zeros(num_envs, dtype=np.int64)
+        self.miss = np.zeros(num_envs, dtype=np.int64)
+
+    def state(self):
+        return np.stack([self.paddle_x*0.01, self.ball_x*0.01, self.ball_y*0.01, self.ball_dx, self.ball_dy], axis=1)
+
+    def reset(self, envs=None):
+        envs = slice(None) if envs is None else envs
+        self.paddle_x[envs] = 0
+        self.ball_x[envs] = BALL_START[0]
+        self.ball_y[envs] = BALL_START[1]
+        return self.state()
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+
+        # Paddle moving, blocked at the same limits as the single game
+        left = (actions == 0) & (self.paddle_x > -PADDLE_LIMIT)
+        right = (actions == 2) & (self.paddle_x < PADDLE_LIMIT)
+        self.paddle_x += PADDLE_STEP * (right.astype(float) - left)
+        rewards = -self.move_penalty * (actions != 1)
+
+        # Ball moving
+        self.ball_x += self.ball_dx
+        self.ball_y += self.ball_dy
+
+        # Ball bounce
+        side = np.abs(self.ball_x) > WALL
+        self.ball_x[side] = np.sign(self.ball_x[side]) * WALL
+        self.ball_dx[side] *= -1
+
+        top = self.ball_y > WALL
+        self.ball_y[top] = WALL
+        self.ball_dy[top] *= -1
+
+        # Ball miss
+        dones = self.ball_y < -WALL
+        self.miss += dones
+        rewards += self.miss_reward * dones
+        self.ball_x[dones] = BALL_START[0]
+        self.ball_y[dones] = BALL_START[1]
+
+        # Ball hit
+        hits = (np.abs(self.ball_y - HIT_Y) < 2) & (np.abs(self.paddle_x - self.ball_x) < PADDLE_HALF_WIDTH)
+        self.ball_dy[hits] *= -1
+        self.hit += hits
+        rewards += self.hit_reward * hits
+
+        if dones.any():
+            self.reset(dones)
+
+        return rewards, self.state(), dones
+
+
+class TurtleRenderer:
+    """ Draws a PongSim with turtle, which is only imported here so the simulator itself runs headless """
+    def __init__(self, title='Pong! - RL Example'):
+        import turtle as t
+
+        # Background
+        self.win = t.Screen()
+        self.win.title(title)
+        self.win.bgcolor('black')
+        self.win.setup(width=600, height=600)
+        self.win.tracer(0)
+
+        # Paddle
+        self.paddle = t.Turtle()
+        self.paddle.speed(0)
+        self.paddle.shape('square')
+        self.paddle.shapesize(stretch_wid=1, stretch_len=5)
+        self.paddle.color('white')
+        self.paddle.penup()
+        self.paddle.goto(0, PADDLE_Y)
+
+        # Ball
+        self.ball = t.Turtle()
+        self.ball.speed(0)
+        self.ball.shape('circle')
+        self.ball.color('red')
+        self.ball.penup()
+        self.ball.goto(*BALL_START)
+
+        # Score
+        self.score = t.Turtle()
+        self.score.speed(0)
+        self.score.color('white')
+        self.score.penup()
+        self.score.hideturtle()
+        self.score.goto(0, 250)
+        self.shown = None
+
+    def draw(self, sim):
+        self.paddle.setx(sim.paddle_x)
+        self.ball.goto(sim.ball_x, sim.ball_y)
+
+        if self.shown != (sim.hit, sim.miss):
+            self.shown = (sim.hit, sim.miss)
+            self.score.clear()
+            self.score.write(f"Hit: {sim.hit}   Missed: {sim.miss}", align='center', font=('Courier', 24, 'normal'))
+
+        self.win.update()
@@ -0,0 +1,50 @@
+import numpy as np
+
+
+class ReplayBuffer:
+    """
+    Replay memory in preallocated arrays used as a ring: once capacity transitions are stored the oldest is overwritten.
+    Adding a transition writes one row of each array, sampling draws indices and gathers whole batches at once,
+    so neither allocates a python object per transition.
+    """
+    def __init__(self, capacity, state_space):
+        self.capacity = capacity
+        self.states = np.zeros((capacity, state_space), dtype=np.float32)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states = np.zeros((capacity, state_space), dtype=np.float32)
+        self.dones = np.zeros(capacity, dtype=np.float32)
+
+        self.index = 0          # row the next transition goes to
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, state, action, reward, next_state, done):
+        i = self.index
+        self.states[i] = np.reshape(state, -1)
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = np.reshape(next_state, -1)
+        self.dones[i] = done
+
+        self.index = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        # one transition per row, for batched environments
+        rows = (self.index + np.arange(len(actions))) % self.capacity
+        self.states[rows] = states
+        self.actions[rows] = actions
+        self.rewards[rows] = rewards
+        self.next_states[rows] = next_states
+        self.dones[rows] = dones
+
+        self.index = int(rows[-1] + 1) % self.capacity
+        self.size = min(self.size + len(actions), self.capacity)
+
+    def sample(self, batch_size):
+        # indices are drawn with replacement, a repeat in a batch of 64 out of thousands of transitions is rare and harmless
+        rows = np.random.randint(0, self.size, size=batch_size)
+        return self.states[rows], self.actions[rows], self.rewards[rows], self.next_states[rows], self.dones[rows]
@@ -1,3 +1,336 @@
+import random
+
+import instrument
+from env import neighborTable
+from patterns import OTHER, RADIUS, UNKNOWN
+from probability import ProbabilityEngine
+from sat import SatBackend
+
+
+class Solver:
+    """
+    Deterministic minesweeper solver.
+    Keeps one constraint per revealed number (its unknown neighbors and how many mines are left among them)
+    and only re-examines the constraints touched by the last reveal or flag. Single cell rules run first,
+    then overlapping constraints are reduced against each other (subset/superset rules),
+    then, given a PatternCache, the 5x5 window around each changed frontier number is looked up.
+    With backend='sat' the frontier is also handed to a SatBackend before guessing, which settles the
+    positions the pair rules miss (long connected frontiers) within its node budget.
+    Drives anything with the leftClicked(x, y)/rightClicked(x, y) interface, a Board or the gui MinesweeperEnv.
+    With chord=True (and flagMines) safe tiles are opened by chording a flagged number next to them
+    whenever that opens more than one tile, which needs chordClicked(x, y) as well.
+    """
+
+    BACKENDS = ['constraints', 'sat']
+
+    def __init__(self, game, flagMines=True, backend='constraints', nodeBudget=100000, samples=500, seed=None,
+                 chord=False, patterns=None):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"unknown solver backend '{backend}', expected one of {self.BACKENDS}")
+
+        self.game = game
+        self.board = getattr(game, 'board', game)
+        self.flagMines = flagMines
+        self.chord = chord and flagMines
+        self.backend = backend
+        self.rng = random.Random(seed)
+        self.probability = ProbabilityEngine(nodeBudget, samples, seed)
+        self.sat = SatBackend(nodeBudget) if backend == 'sat' else None
+        # a PatternCache for the deductions of local windows (patterns.sharedCache to share one), off by default
+        # as the pair rules and the exact probabilities find nearly all of them and the lookups cost more than they save
+        self.patterns = patterns
+
+        self.reset()
+
+    def reset(self):
+        board = self.board
+        self.LENGTH = board.LENGTH
+        self.HEIGHT = board.HEIGHT
+
+        self.neighbors = neighborTable(board.LENGTH, board.HEIGHT).lists
+        # memoryviews follow the board like the arrays do, but read single tiles as python ints
+        self.numbers = memoryview(board.numbers.reshape(-1))
+        self.flagged = memoryview(board.flagged.reshape(-1))
+
+        # solver knowledge
+        self.unknown = set(range(board.LENGTH * board.HEIGHT))
+        self.revealed = set()
+        self.mines = set()
+        self.safe = set()
+        self.flags = []
+
+        # constraints waiting for the single cell rules and for the pair reduction
+        self.dirty = set()
+        self.changed = set()
+        self.windows = set()
+        self.frontier = set()
+
+        self.guesses = 0
+        self.moves = 0
+
+        # pick up tiles that were revealed before the solver was attached
+        self.update([divmod(int(c), board.HEIGHT) for c in board.revealed.reshape(-1).nonzero()[0]])
+
+    def update(self, opened):
+        for x, y in opened:
+            c = x * self.HEIGHT + y
+            self.unknown.discard(c)
+            self.safe.discard(c)
+            self.revealed.add(c)
+
+            self.dirty.add(c)
+            for n in self.neighbors[c]:
+                if n in self.revealed:
+                    self.dirty.add(n)
+
+    def constraint(self, c):
+        unknown = []
+        mines = self.numbers[c]
+        for n in self.neighbors[c]:
+            if n in self.unknown:
+                unknown.append(n)
+            elif n in self.mines:
+                mines -= 1
+
+        return unknown, mines
+
+    def markSafe(self, cells):
+        for c in cells:
+            if c in self.unknown:
+                self.unknown.discard(c)
+                self.safe.add(c)
+                self.touch(c)
+
+    def markMines(self, cells):
+        for c in cells:
+            if c in self.unknown:
+                self.unknown.discard(c)
+                self.mines.add(c)
+                if self.flagMines:
+                    self.flags.append(c)
+                self.touch(c)
+
+    def touch(self, c):
+        for n in self.neighbors[c]:
+            if n in self.revealed:
+                self.dirty.add(n)
+
+    @instrument.timed('solver.singleRules')
+    def singleRules(self):
+        while self.dirty:
+            c = self.dirty.pop()
+            unknown, mines = self.constraint(c)
+
+            if not unknown:
+                self.frontier.discard(c)
+            elif mines == 0:
+                self.markSafe(unknown)
+            elif mines == len(unknown):
+                self.markMines(unknown)
+            else:
+                self.frontier.add(c)
+                self.changed.add(c)
+                self.windows.add(c)
+
+    def window(self, c):
+        # the window around frontier number c, with the tiles it covers (None off the board)
+        x, y = divmod(c, self.HEIGHT)
+        cells = []
+        values = []
+        for dx in range(-RADIUS, RADIUS + 1):
+            for dy in range(-RADIUS, RADIUS + 1):
+                if not (0 <= x + dx < self.LENGTH and 0 <= y + dy < self.HEIGHT):
+                    cells.append(None)
+                    values.append(OTHER)
+                    continue
+
+                n = (x + dx) * self.HEIGHT + y + dy
+                cells.append(n)
+                if n in self.unknown:
+                    values.append(UNKNOWN)
+                elif n in self.revealed and abs(dx) <= 1 and abs(dy) <= 1:
+                    values.append(self.constraint(n)[1])
+                else:
+                    values.append(OTHER)
+
+        return cells, values
+
+    @instrument.timed('solver.patternRules')
+    def patternRules(self):
+        while self.windows:
+            c = self.windows.pop()
+            if c not in self.frontier:
+                continue
+
+            cells, values = self.window(c)
+            safe, mines = self.patterns.lookup(values)
+            safe = [cells[i] for i in safe if cells[i] in self.unknown]
+            mines = [cells[i] for i in mines if cells[i] in self.unknown]
+            if safe or mines:
+                self.markSafe(safe)
+                self.markMines(mines)
+                return True
+
+        return False
+
+    @instrument.timed('solver.pairRules')
+    def pairRules(self):
+        found = False
+
+        while self.changed and not found:
+            a = self.changed.pop()
+            if a not in self.frontier:
+                continue
+            unknownA, minesA = self.constraint(a)
+            setA = set(unknownA)
+
+            # frontier numbers sharing at least one unknown tile with a
+            others = {n for u in unknownA for n in self.neighbors[u] if n in self.frontier and n != a}
+            for b in others:
+                unknownB, minesB = self.constraint(b)
+                setB = set(unknownB)
+
+                onlyA = setA - setB
+                onlyB = setB - setA
+
+                # every mine b has outside a must fill onlyB, so onlyA is safe (and the other way around)
+                if minesB - minesA == len(onlyB):
+                    self.markMines(onlyB)
+                    self.markSafe(onlyA)
+                elif minesA - minesB == len(onlyA):
+                    self.markMines(onlyA)
+                    self.markSafe(onlyB)
+                else:
+                    continue
+
+                if onlyA or onlyB:
+                    found = True
+                    break
+
+        return found
+
+    @instrument.timed('solver.satRules')
+    def satRules(self):
+        safe, mines = self.sat.forced(self.constraints())
+        self.markSafe(safe)
+        self.markMines(mines)
+
+        return bool(safe or mines)
+
+    def deduce(self):
+        self.singleRules()
+        while not self.safe and not self.flags:
+            # the windows are only looked up for what the cheaper pair rules miss
+            if self.pairRules() or (self.patterns is not None and self.patternRules()) or \
+                    (self.sat is not None and self.satRules()):
+                self.singleRules()
+            else:
+                break
+
+    def constraints(self):
+        return [self.constraint(c) for c in self.frontier]
+
+    def chordTile(self, c):
+        """
+        A revealed number next to the safe tile c whose flags are all placed and whose other hidden
+        neighbors are all known safe, so chording it opens c and more without risk. None if there is none.
+        """
+
+        for r in self.neighbors[c]:
+            if r not in self.revealed:
+                continue
+
+            flags = hidden = 0
+            for n in self.neighbors[r]:
+                if self.flagged[n]:
+                    flags += 1
+                elif n == c or n in self.safe:
+                    hidden += 1
+                elif n not in self.revealed:
+                    break
+            else:
+                if flags == self.numbers[r] and hidden > 1:
+                    return r
+
+        return None
+
+    @instrument.timed('solver.guess')
+    def guess(self):
+        """
+        Picks the unknown tile least likely to be a mine.
+        Tiles the exact probabilities prove safe or mined are marked instead, and None is returned.
+        """
+
+        if not self.unknown:
+            return None
+
+        probabilities, exact = self.probability.calculate(self.constraints(), self.unknown, self.board.MINES - len(self.mines))
+        if exact:
+            self.markSafe([c for c, p in probabilities.items() if p <= 1e-12])
+            self.markMines([c for c, p in probabilities.items() if p >= 1 - 1e-12])
+            if self.safe or self.flags:
+                return None
+
+            probabilities = {c: p for c, p in probabilities.items() if c in self.unknown}
+            if not probabilities:
+                return None
+
+        # the first click of a first click safe board can not lose, so it is no guess
+        if self.revealed or self.board.pending is None:
+            self.guesses += 1
+        best = min(probabilities.values())
+        return self.rng.choice([c for c, p in probabilities.items() if p <= best + 1e-12])
+
+    @instrument.timed('solver.step')
+    def step(self):
+        """
+        Plays a single move: a pending flag, a known safe tile, or the safest guess when nothing can be deduced.
+        Returns False once there is nothing left to play.
+        """
+
+        board = self.board
+        if board.won() or board.lost():
+            return False
+
+        # the board was reset under the solver (the gui starts a new game on its own)
+        if board.revealedCount < len(self.revealed):
+            self.reset()
+
+        c = None
+        if not self.safe and not self.flags:
+            self.deduce()
+            if not self.safe and not self.flags:
+                c = self.guess()
+
+        if self.flags:
+            self.moves += 1
+            self.game.rightClicked(*divmod(self.flags.pop(), self.HEIGHT))
+            return True
+
+        r = None
+        if c is None:
+            if not self.safe:
+                return False
+            c = self.safe.pop()
+            if self.chord:
+                r = self.chordTile(c)
+
+        self.moves += 1
+
+        if r is not None:
+            opened = self.game.chordClicked(*divmod(r, self.HEIGHT))
+        else:
+            opened = self.game.leftClicked(*divmod(c, self.HEIGHT))
+        self.update(opened)
+        return True
+
+    def solve(self):
+        while self.step():
+            pass
+
+        return self.board.won()
+
+
 class DQNAgent:
     def __init__(self):
         pass
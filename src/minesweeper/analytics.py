@@ -0,0 +1,127 @@
+import os
+
+import numpy as np
+
+from stats import readStats
+
+# column name, dtype and value for records that predate the column
+COLUMNS = [
+    ('won', np.bool_, False),
+    ('time', np.float64, np.nan),
+    ('3bv', np.int32, 0),
+    ('revealed 3bv', np.int32, 0),
+    ('3bv/s', np.float64, np.nan),
+    ('left', np.int32, 0),
+    ('right', np.int32, 0),
+    ('chord', np.int32, 0),
+    ('efficiency', np.float64, np.nan),
+    ('difficulty', 'U16', 'unknown'),
+]
+
+
+def flatten(record):
+    # the click counts are nested in the records gameEnd writes
+    clicks = record.get("clicks", {})
+    return {**record, "left": clicks.get("left"), "right": clicks.get("right"), "chord": clicks.get("chord")}
+
+
+def loadLog(path='statistics.jsonl', chunk=100000):
+    """
+    Reads a statistics log into one numpy array per column, parsing chunk records at a time.
+    """
+
+    chunks = {name: [] for name, _, _ in COLUMNS}
+    rows = []
+
+    def flush():
+        for name, dtype, missing in COLUMNS:
+            values = [missing if row.get(name) is None else row[name] for row in rows]
+            chunks[name].append(np.array(values, dtype=dtype))
+        rows.clear()
+
+    for record in readStats(path):
+        rows.append(flatten(record))
+        if len(rows) >= chunk:
+            flush()
+    flush()
+
+    return {name: np.concatenate(chunks[name]) for name, _, _ in COLUMNS}
+
+
+def fileName(name):
+    return name.replace('/', '_per_') + '.npy'
+
+
+def saveColumns(columns, directory):
+    os.makedirs(directory, exist_ok=True)
+    for name, values in columns.items():
+        np.save(os.path.join(directory, fileName(name)), values)
+
+
+def loadColumns(directory, mmap=True):
+    """
+    Loads columns written by saveColumns, memory mapped unless mmap is False.
+    """
+
+    return {name: np.load(os.path.join(directory, fileName(name)), mmap_mode='r' if mmap else None)
+            for name, _, _ in COLUMNS if os.path.exists(os.path.join(directory, fileName(name)))}
+
+
+def groupedMean(groups, values):
+    """
+    Mean of values per group, NaN values are left out.
+    Returns the groups and their means.
+    """
+
+    keys, inverse = np.unique(groups, return_inverse=True)
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+
+    totals = np.bincount(inverse[valid], weights=values[valid], minlength=keys.size)
+    counts = np.bincount(inverse[valid], minlength=keys.size)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return keys, totals / counts
+
+
+def groupedPercentiles(groups, values, q=(50, 90, 99)):
+    """
+    Percentiles of values per group (nearest rank), NaN values are left out.
+    Returns the groups and an array shaped (groups, len(q)).
+    """
+
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    keys, inverse = np.unique(np.asarray(groups)[valid], return_inverse=True)
+    values = values[valid]
+
+    # sort by group, then by value, and read every percentile off its rank inside the group
+    order = np.lexsort((values, inverse))
+    counts = np.bincount(inverse, minlength=keys.size)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    ranks = np.ceil(np.outer(counts, np.asarray(q) / 100)).astype(np.intp) - 1
+    ranks = np.clip(ranks, 0, np.maximum(counts - 1, 0)[:, np.newaxis])
+
+    return keys, values[order][starts[:, np.newaxis] + ranks]
+
+
+def winRateBy3BV(columns, width=10):
+    """
+    Win rate per 3BV bucket of the given width.
+    Returns the lower edge of each bucket, its win rate and its number of games.
+    """
+
+    buckets = np.asarray(columns['3bv']) // width * width
+    keys, rates = groupedMean(buckets, columns['won'])
+    _, counts = np.unique(buckets, return_counts=True)
+
+    return keys, rates, counts
+
+
+def tbvPerSecPercentiles(columns, q=(50, 90, 99)):
+    # 3bv/s of won games per difficulty
+    won = np.asarray(columns['won'])
+    return groupedPercentiles(np.asarray(columns['difficulty'])[won], np.asarray(columns['3bv/s'])[won], q)
+
+
+def efficiencyByDifficulty(columns):
+    return groupedMean(columns['difficulty'], columns['efficiency'])
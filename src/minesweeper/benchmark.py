@@ -0,0 +1,316 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from env import ADJACENT_TILES, PRESETS, Board, calcTBV, generateBoards
+from agent import Solver
+
+# board sizes benchmarked by default, the presets and one large board
+SIZES = {**PRESETS, 'large': (100, 100, 2000)}
+
+
+def timed(fn, repeats):
+    """
+    Runs fn (which returns how many operations it did) repeats times.
+    Returns the operations and seconds of the fastest run, so background noise shows up less between commits.
+    """
+
+    best = None
+    for _ in range(repeats):
+        t = time.perf_counter()
+        ops = fn()
+        seconds = time.perf_counter() - t
+        if best is None or ops / seconds > best[0] / best[1]:
+            best = ops, seconds
+
+    return best
+
+
+def benchGenerate(length, height, mines, boards, seed):
+    # batched generation of mines and numbers
+    def run():
+        generateBoards(boards, length, height, mines, np.random.default_rng(seed))
+        return boards
+
+    return run
+
+
+def benchSetup(length, height, mines, boards, seed):
+    # one board at a time, including the 3bv units
+    board = Board(length, height, mines)
+
+    def run():
+        for i in range(boards):
+            board.setup(seed << 32 | i)
+        return boards
+
+    return run
+
+
+def benchReveal(length, height, mines, boards, seed):
+    # every safe tile of a board clicked in a seeded random order, counted whether it opens anything or not
+    board = Board(length, height, mines)
+    rng = np.random.default_rng(seed)
+    layouts = []
+    for i in range(boards):
+        board.setup(seed << 32 | i)
+        safe = np.flatnonzero(~board.mines)
+        layouts.append((board.mines.copy(), [divmod(int(c), height) for c in rng.permutation(safe)]))
+
+    def run():
+        reveals = 0
+        for mines, order in layouts:
+            board.clear()
+            board.load(mines)
+            for x, y in order:
+                board.reveal(x, y)
+            reveals += len(order)
+        return reveals
+
+    return run
+
+
+def benchTBV(length, height, mines, boards, seed):
+    _, numbers = generateBoards(boards, length, height, mines, np.random.default_rng(seed))
+
+    def run():
+        for i in range(boards):
+            calcTBV(numbers[i])
+        return boards
+
+    return run
+
+
+def benchSolver(length, height, mines, boards, seed):
+    board = Board(length, height, mines, firstClickSafe=True)
+
+    def run():
+        moves = 0
+        for i in range(boards):
+            board.setup(seed << 32 | i)
+            solver = Solver(board, flagMines=False, seed=seed << 32 | i)
+            solver.solve()
+            moves += solver.moves
+        return moves
+
+    return run
+
+
+class LegacyBoard:
+    """
+    The per tile loops of the original gui MinesweeperEnv, the baseline every engine change is measured against:
+    placeMines, setNumbers, calcTBV with its recursive flood fill and the recursive leftClicked, ported line by line
+    with the MineButton attributes kept in nested lists instead of on widgets, so they run without a display.
+    """
+
+    def __init__(self, length, height, mines, seed=None):
+        self.LENGTH = length
+        self.HEIGHT = height
+        self.MINES = mines
+        self.TILE_COORDINATES = [[x, y] for x in range(length) for y in range(height)]
+        self.random = random.Random(seed)
+        self.initBoard()
+
+    def initBoard(self):
+        # the fresh buttons of a new game
+        self.num = [[0] * self.HEIGHT for _ in range(self.LENGTH)]
+        self.isMarked = [[False] * self.HEIGHT for _ in range(self.LENGTH)]
+        self.isRevealed = [[False] * self.HEIGHT for _ in range(self.LENGTH)]
+        self.isFlagged = [[False] * self.HEIGHT for _ in range(self.LENGTH)]
+        self.revealed = 0
+        self.over = False
+
+    def placeMines(self):
+        randList = [divmod(i, self.HEIGHT) for i in self.random.sample(range(self.LENGTH * self.HEIGHT), self.MINES)]
+
+        for x, y in randList:
+            self.num[x][y] = -1
+            self.isMarked[x][y] = True
+
+    def setNumbers(self):
+        for x, y in self.TILE_COORDINATES:
+            if self.num[x][y] == -1:
+                continue
+
+            count = 0
+            for dx, dy in ADJACENT_TILES:
+                if 0 <= x + dx < self.LENGTH and 0 <= y + dy < self.HEIGHT:
+                    if self.num[x + dx][y + dy] == -1:
+                        count += 1
+
+            if count != 0:
+                self.num[x][y] = count
+
+    def calcTBV(self):
+        tbv = 0
+
+        for x, y in self.TILE_COORDINATES:
+            if self.isMarked[x][y]:
+                continue
+            elif self.num[x][y] == -1:
+                self.isMarked[x][y] = True
+                continue
+            elif self.num[x][y] == 0:
+                self.isMarked[x][y] = True
+                tbv += 1
+                self.floodMark(x, y)
+
+        for x, y in self.TILE_COORDINATES:
+            if not self.isMarked[x][y]:
+                tbv += 1
+
+        return tbv
+
+    def floodMark(self, x, y):
+        for dx, dy in ADJACENT_TILES:
+            if 0 <= (x + dx) < self.LENGTH and 0 <= (y + dy) < self.HEIGHT:
+                if self.isMarked[x + dx][y + dy]:
+                    continue
+
+                self.isMarked[x + dx][y + dy] = True
+                if self.num[x + dx][y + dy] == 0:
+                    self.floodMark(x + dx, y + dy)
+
+    def leftClicked(self, x, y):
+        if self.isFlagged[x][y]:
+            return
+
+        if not self.isRevealed[x][y] and self.num[x][y] != -1:
+            self.isRevealed[x][y] = True
+
+            for dx, dy in ADJACENT_TILES:
+                if 0 <= x + dx < self.LENGTH and 0 <= y + dy < self.HEIGHT:
+                    if self.num[x][y] == 0:
+                        self.leftClicked(x + dx, y + dy)
+
+            self.revealed += 1
+            if self.revealed == self.LENGTH * self.HEIGHT - self.MINES:
+                self.over = True
+        elif self.num[x][y] == -1 and self.revealed > 0:
+            self.over = True
+
+
+def benchLegacy(length, height, mines, boards, seed):
+    legacy = LegacyBoard(length, height, mines, seed)
+    # the recursive flood fills go as deep as the largest empty region
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 4 * length * height + 100))
+
+    def placeMines():
+        for _ in range(boards):
+            legacy.initBoard()
+            legacy.placeMines()
+        return boards
+
+    # the same layouts for setNumbers, calcTBV and leftClicked, as placed and once numbered
+    layouts = []
+    for _ in range(boards):
+        legacy.initBoard()
+        legacy.placeMines()
+        placed = [row[:] for row in legacy.num]
+        legacy.setNumbers()
+        layouts.append((placed, legacy.num, legacy.isMarked))
+
+    def setNumbers():
+        for placed, _, _ in layouts:
+            legacy.num = [row[:] for row in placed]
+            legacy.setNumbers()
+        return boards
+
+    def tbv():
+        for _, num, marked in layouts:
+            legacy.num = num
+            legacy.isMarked = [row[:] for row in marked]
+            legacy.calcTBV()
+        return boards
+
+    def leftClicked():
+        rng = np.random.default_rng(seed)
+        clicks = 0
+        for _, num, _ in layouts:
+            legacy.initBoard()
+            legacy.num = num
+            # random clicks until the game ends
+            for c in rng.permutation(length * height):
+                legacy.leftClicked(*divmod(int(c), height))
+                clicks += 1
+                if legacy.over:
+                    break
+        return clicks
+
+    return {'legacy placeMines': (placeMines, 'boards'), 'legacy setNumbers': (setNumbers, 'boards'),
+            'legacy calcTBV': (tbv, 'boards'), 'legacy leftClicked': (leftClicked, 'clicks')}
+
+
+BENCHMARKS = {
+    'generate': (benchGenerate, 'boards'),
+    'setup': (benchSetup, 'boards'),
+    'reveal': (benchReveal, 'reveals'),
+    '3bv': (benchTBV, 'boards'),
+    'solver': (benchSolver, 'moves'),
+}
+
+
+def commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def runBenchmarks(sizes, names, boards=20, repeats=3, seed=0, legacy=True):
+    results = []
+
+    def record(name, size, unit, ops, seconds):
+        results.append({"benchmark": name, "size": size, "unit": unit, "ops": ops,
+                        "seconds": round(seconds, 6), "per second": round(ops / seconds, 2)})
+        print(f"{name:<18} {size:<14} {ops / seconds:>14.1f} {unit}/s")
+
+    for size in sizes:
+        length, height, mines = SIZES[size]
+        # fewer boards on large sizes, so every benchmark takes about as long
+        count = max(1, boards * 480 // (length * height))
+
+        for name in names:
+            bench, unit = BENCHMARKS[name]
+            record(name, size, unit, *timed(bench(length, height, mines, count, seed), repeats))
+
+        if legacy:
+            for name, (run, unit) in benchLegacy(length, height, mines, count, seed).items():
+                record(name, size, unit, *timed(run, repeats))
+
+    return {
+        "commit": commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "seed": seed,
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure generation, reveal, 3bv and solver throughput')
+    parser.add_argument('--sizes', nargs='+', choices=list(SIZES), default=list(SIZES))
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument('-n', '--boards', type=int, default=20, help='boards per run on an expert sized board')
+    parser.add_argument('-r', '--repeats', type=int, default=3, help='runs per benchmark, the fastest is kept')
+    parser.add_argument('-s', '--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', default='benchmark.json', help='where the json results are written')
+    parser.add_argument('--no-legacy', action='store_true', help='skip the per tile loops of the original gui')
+    args = parser.parse_args()
+
+    results = runBenchmarks(args.sizes, args.only, args.boards, args.repeats, args.seed, not args.no_legacy)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
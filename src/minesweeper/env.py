@@ -1,2 +1,590 @@
-class MinesweeperEnv:
-    pass
\ No newline at end of file
+import functools
+from collections import deque
+
+import numpy as np
+
+import instrument
+
+# file constants
+ADJACENT_TILES = [[-1, -1], [0, -1], [-1, 0], [1, -1], [-1, 1], [0, 1], [1, 0], [1, 1]]
+
+# board states, a game ends in exactly one of WON or LOST
+PLAYING = 0
+WON = 1
+LOST = 2
+
+# length, height and mines of the standard difficulties
+PRESETS = {
+    'beginner': (9, 9, 10),
+    'intermediate': (16, 16, 40),
+    'expert': (16, 30, 99),
+}
+
+# boards with more tiles than this place their mines block by block and skip the neighbor table, to bound memory
+BLOCK = 1 << 22
+
+# batches of opened tiles up to this size are marked one by one in openTiles
+FEW = 8
+
+
+def boardSize(difficulty='intermediate', length=None, height=None, mines=None):
+    """
+    Length, height and mines of a preset, or of a custom board when difficulty is 'custom'.
+    """
+
+    if difficulty == 'custom':
+        if None in (length, height, mines):
+            raise ValueError("custom boards need a length, height and mine count")
+        if length < 1 or height < 1 or not 0 <= mines < length * height:
+            raise ValueError(f"can not place {mines} mines on a {length}x{height} board")
+        return length, height, mines
+
+    if difficulty not in PRESETS:
+        raise ValueError(f"unknown difficulty '{difficulty}', expected one of {list(PRESETS) + ['custom']}")
+    return PRESETS[difficulty]
+
+
+def indexType(size):
+    # smallest index dtype that can address every tile
+    return np.int32 if size < 2 ** 31 else np.int64
+
+
+class NeighborTable:
+    """
+    Neighbors of every tile of a length x height board in CSR layout, tile index is x * height + y:
+    the neighbors of tile c are indices[offsets[c]:offsets[c + 1]], in ADJACENT_TILES order.
+    Both are flat int arrays, so the table stays compact on large boards.
+    """
+
+    def __init__(self, length, height):
+        self.LENGTH = length
+        self.HEIGHT = height
+
+        dtype = indexType(length * height)
+        x, y = np.divmod(np.arange(length * height, dtype=dtype), height)
+        dx, dy = np.array(ADJACENT_TILES, dtype=dtype).T
+
+        nx = x[:, np.newaxis] + dx
+        ny = y[:, np.newaxis] + dy
+        valid = (0 <= nx) & (nx < length) & (0 <= ny) & (ny < height)
+
+        self.indices = (nx * height + ny)[valid]
+        self.offsets = np.zeros(length * height + 1, dtype=dtype)
+        np.cumsum(np.count_nonzero(valid, axis=1), out=self.offsets[1:])
+
+    @functools.cached_property
+    def lists(self):
+        # one python list per tile, the fastest form for pure python loops on boards of ordinary size
+        indices = self.indices.tolist()
+        offsets = self.offsets.tolist()
+        return [indices[offsets[c]:offsets[c + 1]] for c in range(len(offsets) - 1)]
+
+
+# tables for the most recently used board sizes
+@functools.lru_cache(maxsize=16)
+def neighborTable(length, height):
+    return NeighborTable(length, height)
+
+
+def countNeighbors(mask):
+    """
+    Counts the set neighbors of every cell for a stack of boards shaped (n, length, height).
+    Sums the zero padded 3x3 box around each cell in two separable passes and removes the cell itself.
+    """
+
+    counts = np.pad(mask.astype(np.int8), ((0, 0), (1, 1), (1, 1)))
+    counts = counts[:, :-2] + counts[:, 1:-1] + counts[:, 2:]
+    counts = counts[:, :, :-2] + counts[:, :, 1:-1] + counts[:, :, 2:]
+    counts -= mask
+
+    return counts
+
+
+def generateBoards(n, length, height, mines, rng=None, safe=None):
+    """
+    Generates n boards at once.
+    A safe (x, y) tile is kept free of mines together with its neighbors, so the first click there opens a region,
+    unless the board is too crowded for that and only the tile itself is kept free.
+    Returns the stacked mine masks and neighbor counts (-1 for mines), both shaped (n, length, height).
+    """
+
+    rng = np.random.default_rng(rng)
+    cells = length * height
+
+    keep = []
+    if safe is not None:
+        x, y = safe
+        keep = [(x + dx) * height + y + dy for dx, dy in ADJACENT_TILES + [[0, 0]]
+                if 0 <= x + dx < length and 0 <= y + dy < height]
+        if cells - len(keep) < mines:
+            keep = [x * height + y]
+
+    # the cells holding the lowest random keys of each board become mines
+    if n == 1 and cells > BLOCK:
+        mask = placeMinesInBlocks(cells, mines, rng, keep)[np.newaxis]
+    else:
+        mask = np.zeros((n, cells), dtype=bool)
+        if mines > 0:
+            keys = rng.random((n, cells))
+            keys[:, keep] = 2
+            np.put_along_axis(mask, np.argpartition(keys, mines - 1, axis=1)[:, :mines], True, axis=1)
+    mask = mask.reshape(n, length, height)
+
+    numbers = countNeighbors(mask)
+    numbers[mask] = -1
+
+    return mask, numbers
+
+
+def placeMinesInBlocks(cells, mines, rng, keep=()):
+    """
+    Picks the mines of one large board uniformly, without materializing random keys for the whole board:
+    the mine count of every block is drawn from the multivariate hypergeometric distribution first,
+    then the mines are placed inside each block on its own.
+    Returns the flat mine mask.
+    """
+
+    mask = np.zeros(cells, dtype=bool)
+    starts = np.arange(0, cells, BLOCK)
+    sizes = np.minimum(BLOCK, cells - starts)
+    keep = np.asarray(keep, dtype=np.int64)
+
+    free = sizes - np.bincount(keep // BLOCK, minlength=starts.size)
+    for start, size, count in zip(starts, sizes, rng.multivariate_hypergeometric(free, mines)):
+        if count == 0:
+            continue
+        keys = rng.random(size)
+        keys[keep[(keep >= start) & (keep < start + size)] - start] = 2
+        mask[start + np.argpartition(keys, count - 1)[:count]] = True
+
+    return mask
+
+
+def dilate(mask):
+    # every cell touching a set cell (itself included), for a stack of boards
+    grown = np.pad(mask, ((0, 0), (1, 1), (1, 1)))
+    grown = grown[:, :-2] | grown[:, 1:-1] | grown[:, 2:]
+    return grown[:, :, :-2] | grown[:, :, 1:-1] | grown[:, :, 2:]
+
+
+def labelZeros(numbers):
+    """
+    Labels the connected regions of empty ("0") cells for a stack of boards shaped (n, length, height).
+    Regions are joined with a union find over the neighbor pairs of empty cells, hooking every root onto the
+    smallest root it touches and jumping pointers until each cell points at its root, so no recursion is needed.
+    Returns the labels (-1 for non empty cells, unique across the whole stack) and the number of regions per board.
+    """
+
+    n = numbers.shape[0]
+    empty = numbers == 0
+
+    # compact ids for the empty cells only
+    dtype = indexType(empty.size)
+    cells = np.flatnonzero(empty)
+    ids = np.full(empty.shape, -1, dtype=dtype)
+    ids.flat[cells] = np.arange(cells.size, dtype=dtype)
+
+    # pairs of empty neighbors, each pair taken once
+    length, height = empty.shape[1:]
+    src, dst = [], []
+    for dx, dy in [[1, 0], [0, 1], [1, 1], [1, -1]]:
+        a = (slice(None), slice(0, length - dx), slice(max(0, -dy), height - max(0, dy)))
+        b = (slice(None), slice(dx, length), slice(max(0, dy), height - max(0, -dy)))
+        pair = empty[a] & empty[b]
+        src.append(ids[a][pair])
+        dst.append(ids[b][pair])
+    src = np.concatenate(src)
+    dst = np.concatenate(dst)
+
+    parent = np.arange(cells.size, dtype=dtype)
+    while src.size:
+        rootSrc = parent[src]
+        rootDst = parent[dst]
+
+        # pairs already in one region stay joined, so only the others are kept for the next round
+        joined = rootSrc != rootDst
+        src, dst = src[joined], dst[joined]
+        rootSrc, rootDst = rootSrc[joined], rootDst[joined]
+        if not src.size:
+            break
+
+        # hook the larger root onto the smaller one
+        np.minimum.at(parent, np.maximum(rootSrc, rootDst), np.minimum(rootSrc, rootDst))
+
+        # pointer jumping until every cell points at its root
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+
+    # number the roots in order, every cell takes the number of its root
+    isRoot = parent == np.arange(cells.size, dtype=dtype)
+    compact = (np.cumsum(isRoot, dtype=dtype) - 1)[parent]
+
+    labels = np.full(empty.shape, -1, dtype=dtype)
+    labels.flat[cells] = compact
+    regions = np.bincount(cells[isRoot] // empty[0].size, minlength=n)
+
+    return labels, regions
+
+
+def regionBoxes(labels, regions):
+    """
+    Bounding box of every labeled region of one board, as inclusive rows (x first, x last, y first, y last).
+    """
+
+    length, height = labels.shape
+    boxes = np.empty((4, regions), dtype=np.int64)
+    boxes[[0, 2]] = max(length, height)
+    boxes[[1, 3]] = -1
+
+    tiles = np.flatnonzero(labels >= 0)
+    label = labels.reshape(-1)[tiles]
+    x, y = np.divmod(tiles, height)
+    np.minimum.at(boxes[0], label, x)
+    np.maximum.at(boxes[1], label, x)
+    np.minimum.at(boxes[2], label, y)
+    np.maximum.at(boxes[3], label, y)
+
+    return boxes
+
+
+def calcTBV(numbers):
+    """
+    Calculates the minimum number of clicks to solve the board (3BV), for a single board or a stack of boards.
+    Every region of empty cells counts once (it opens together with its border),
+    and every other non mine cell that does not border an empty cell counts once.
+    """
+
+    single = numbers.ndim == 2
+    if single:
+        numbers = numbers[np.newaxis]
+
+    _, regions = labelZeros(numbers)
+    isolated = (numbers > 0) & (countNeighbors(numbers == 0) == 0)
+    tbv = regions + np.count_nonzero(isolated, axis=(1, 2))
+
+    if single:
+        return int(tbv[0])
+    return tbv
+
+
+# headless minesweeper board, all state is kept in numpy arrays indexed [x][y]
+class Board:
+    def __init__(self, length=16, height=16, mines=40, firstClickSafe=False):
+        # board constants
+        self.LENGTH = length
+        self.HEIGHT = height
+        self.MINES = mines
+
+        # with first click safety the mines are only placed once the first tile is revealed, around that tile
+        self.firstClickSafe = firstClickSafe
+        self.pending = None
+        self.safeTile = None
+
+        # mine mask, neighbor counts (-1 for mines), revealed and flagged bitmaps
+        self.mines = np.zeros((self.LENGTH, self.HEIGHT), dtype=bool)
+        self.numbers = np.zeros((self.LENGTH, self.HEIGHT), dtype=np.int8)
+        self.revealed = np.zeros((self.LENGTH, self.HEIGHT), dtype=bool)
+        self.flagged = np.zeros((self.LENGTH, self.HEIGHT), dtype=bool)
+
+        # 3bv unit of every tile (-1 for tiles that open with an empty region's border or are mines)
+        self.units = np.full(self.LENGTH * self.HEIGHT, -1, dtype=indexType(self.LENGTH * self.HEIGHT))
+        self.solvedUnits = np.zeros(0, dtype=bool)
+        self.tbv = 0
+
+        # game state, the safe tiles still hidden decide the win without scanning the board
+        self.state = PLAYING
+        self.safeRemaining = self.LENGTH * self.HEIGHT - self.MINES
+        # called with won (True or False) once per game, when it ends
+        self.listeners = []
+
+        self.revealedCount = 0
+        self.revealedTBV = 0
+        self.leftClicks = 0
+        self.rightClicks = 0
+        self.chordClicks = 0
+        self.exploded = None
+
+        # integer seed the mines were generated from, if any
+        self.seed = None
+
+    def clear(self):
+        self.mines[:] = False
+        self.numbers[:] = 0
+        self.revealed[:] = False
+        self.flagged[:] = False
+
+        self.units[:] = -1
+        self.solvedUnits = np.zeros(0, dtype=bool)
+        self.tbv = 0
+
+        self.state = PLAYING
+        self.safeRemaining = self.LENGTH * self.HEIGHT - self.MINES
+
+        self.revealedCount = 0
+        self.revealedTBV = 0
+        self.leftClicks = 0
+        self.rightClicks = 0
+        self.chordClicks = 0
+        self.exploded = None
+
+        self.pending = None
+        self.safeTile = None
+
+    def inBounds(self, x, y):
+        return 0 <= x < self.LENGTH and 0 <= y < self.HEIGHT
+
+    def neighbors(self, c):
+        # computed neighbors, for boards too large for a neighbor table
+        x, y = divmod(c, self.HEIGHT)
+        return [(x + dx) * self.HEIGHT + y + dy for dx, dy in ADJACENT_TILES if self.inBounds(x + dx, y + dy)]
+
+    def isMine(self, x, y):
+        return self.numbers[x, y] == -1
+
+    def placeMines(self):
+        mines, _ = generateBoards(1, self.LENGTH, self.HEIGHT, self.MINES)
+        self.mines[:] = mines[0]
+
+    def setNumbers(self):
+        self.numbers[:] = countNeighbors(self.mines[np.newaxis])[0]
+        self.numbers[self.mines] = -1
+
+    def calcTBV(self):
+        return calcTBV(self.numbers)
+
+    def setUnits(self):
+        """
+        Numbers the clicks that make up the 3BV: one per empty region, one per tile not bordering an empty region.
+        Revealing a tile then solves its unit, so the revealed 3BV is kept up to date as tiles open.
+        """
+
+        labels, regions = labelZeros(self.numbers[np.newaxis])
+        isolated = (self.numbers > 0) & (countNeighbors(self.numbers[np.newaxis] == 0)[0] == 0)
+
+        units = labels[0]
+        # large boards open their empty regions by label instead of flood filling them
+        self.regionBoxes = regionBoxes(units, int(regions[0])) if units.size > BLOCK else None
+        units[isolated] = regions[0] + np.arange(np.count_nonzero(isolated))
+        self.units[:] = units.reshape(-1)
+
+        self.tbv = int(regions[0]) + int(np.count_nonzero(isolated))
+        self.solvedUnits = np.zeros(self.tbv, dtype=bool)
+        self.revealedTBV = 0
+
+    @instrument.timed('board.setup')
+    def setup(self, rng=None):
+        self.clear()
+        self.seed = int(rng) if isinstance(rng, (int, np.integer)) else None
+
+        if self.firstClickSafe:
+            self.pending = np.random.default_rng(rng)
+        else:
+            self.generate(rng)
+
+    def generate(self, rng=None, safe=None):
+        mines, numbers = generateBoards(1, self.LENGTH, self.HEIGHT, self.MINES, rng, safe)
+        self.load(mines[0], safe, numbers[0])
+
+    # play a given mine layout, safe is the tile the layout was made safe for, numbers are counted unless given
+    def load(self, mines, safe=None, numbers=None):
+        self.mines[:] = mines
+        if numbers is None:
+            self.setNumbers()
+        else:
+            self.numbers[:] = numbers
+        self.setUnits()
+
+        self.pending = None
+        self.safeTile = safe
+
+    @instrument.timed('board.reveal')
+    def reveal(self, x, y):
+        """
+        Reveals a tile and, for an empty tile, the whole empty region around it with its border.
+        Returns the list of tiles that were opened by this call.
+        """
+
+        c = x * self.HEIGHT + y
+        if self.state != PLAYING or self.flagged[x, y] or self.revealed[x, y]:
+            return []
+
+        if self.pending is not None:
+            self.generate(self.pending, (x, y))
+
+        return self.openTiles([c])
+
+    @instrument.timed('board.chord')
+    def chord(self, x, y):
+        """
+        Reveals every hidden, unflagged neighbor of a revealed number that has exactly as many flags around it.
+        All of them are opened in one batch, cascading through empty tiles like reveal; a wrong flag sets off
+        the mines it leaves hidden. Returns the list of tiles that were opened.
+        """
+
+        c = x * self.HEIGHT + y
+        if self.state != PLAYING or not self.revealed[x, y] or self.numbers[x, y] <= 0:
+            return []
+
+        if self.revealed.size <= BLOCK:
+            table = neighborTable(self.LENGTH, self.HEIGHT)
+            around = table.indices[table.offsets[c]:table.offsets[c + 1]]
+        else:
+            around = np.array(self.neighbors(c))
+
+        flagged = self.flagged.reshape(-1)[around]
+        if np.count_nonzero(flagged) != self.numbers[x, y]:
+            return []
+
+        return self.openTiles(around[~flagged & ~self.revealed.reshape(-1)[around]].tolist())
+
+    def openTiles(self, tiles):
+        """
+        Opens hidden, unflagged tiles (flat indices) and every empty region reached from them, with its border.
+        The regions are opened with one queue and marked revealed in one go, so the work is proportional to the opened area.
+        Boards over BLOCK tiles open them with openRegions instead and return the opened tiles as an (n, 2) array.
+        """
+
+        revealed = self.revealed.reshape(-1)
+        flagged = self.flagged.reshape(-1)
+        numbers = self.numbers.reshape(-1)
+
+        exploded = [c for c in tiles if numbers[c] == -1]
+        opened = [c for c in tiles if numbers[c] != -1]
+        if exploded:
+            revealed[exploded] = True
+            self.exploded = divmod(exploded[0], self.HEIGHT)
+
+        empty = [c for c in opened if numbers[c] == 0]
+        if empty and revealed.size > BLOCK:
+            opened = self.openRegions(opened, empty)
+        elif empty:
+            # memoryviews read single tiles much faster than numpy scalar indexing
+            revealedView = memoryview(revealed)
+            flaggedView = memoryview(flagged)
+            numbersView = memoryview(numbers)
+
+            table = neighborTable(self.LENGTH, self.HEIGHT)
+            offsets = memoryview(table.offsets)
+            indices = memoryview(table.indices)
+
+            seen = set(opened)
+            queue = deque(empty)
+            while queue:
+                tile = queue.popleft()
+                for n in indices[offsets[tile]:offsets[tile + 1]]:
+                    if not revealedView[n] and not flaggedView[n] and n not in seen:
+                        seen.add(n)
+                        opened.append(n)
+                        if numbersView[n] == 0:
+                            queue.append(n)
+
+        self.revealedCount += len(opened)
+        self.safeRemaining -= len(opened)
+
+        if len(opened) <= FEW:
+            # most reveals open a single number, marking it tile by tile skips the numpy call overhead
+            for c in opened:
+                revealed[c] = True
+                unit = self.units[c]
+                if unit >= 0 and not self.solvedUnits[unit]:
+                    self.solvedUnits[unit] = True
+                    self.revealedTBV += 1
+        else:
+            revealed[opened] = True
+            # counting the solved units is cheaper than finding the distinct new ones among the opened tiles
+            units = self.units[opened]
+            self.solvedUnits[units[units >= 0]] = True
+            self.revealedTBV = int(np.count_nonzero(self.solvedUnits))
+
+        if exploded:
+            self.finish(LOST)
+        elif self.safeRemaining == 0:
+            self.finish(WON)
+
+        if revealed.size > BLOCK:
+            return np.column_stack(np.divmod(np.concatenate([np.array(exploded, dtype=np.int64), opened]), self.HEIGHT))
+        return [divmod(c, self.HEIGHT) for c in exploded + opened]
+
+    def openRegions(self, tiles, empty):
+        """
+        The flood fill of openTiles for boards over BLOCK tiles, without a python object per opened tile:
+        the empty regions are already labeled in units, so each one is opened as its label mask grown by one tile,
+        cut to the region's bounding box. A region holding flagged or revealed tiles is cut at them like the flood
+        fill is, only the parts connected to the clicked tiles are opened. Returns the opened tiles (flat indices).
+        """
+
+        # tiles are marked revealed region by region, so a border shared by two regions is opened once
+        units = self.units.reshape(self.LENGTH, self.HEIGHT)
+        starts = {}
+        for c in empty:
+            starts.setdefault(int(self.units[c]), []).append(divmod(c, self.HEIGHT))
+
+        opened = []
+        for label, clicked in starts.items():
+            xFirst, xLast, yFirst, yLast = self.regionBoxes[:, label]
+            x0, y0 = max(xFirst - 1, 0), max(yFirst - 1, 0)
+            box = (slice(x0, xLast + 2), slice(y0, yLast + 2))
+
+            region = units[box] == label
+            closed = self.revealed[box] | self.flagged[box]
+            if (region & closed).any():
+                # the flood fill does not pass flagged or revealed tiles, keep the parts of the region it reaches
+                parts, _ = labelZeros(np.where(region & ~closed, 0, 1)[np.newaxis])
+                x, y = np.array(clicked).T
+                region = np.isin(parts[0], parts[0, x - x0, y - y0])
+
+            grown = dilate(region[np.newaxis])[0] & ~closed
+            self.revealed[box] |= grown
+            x, y = np.nonzero(grown)
+            opened.append((x + x0) * self.HEIGHT + y + y0)
+
+        revealed = self.revealed.reshape(-1)
+        opened.append(np.array([c for c in tiles if not revealed[c]], dtype=np.int64))
+        return np.concatenate(opened)
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+
+    def finish(self, state):
+        # the one terminal event of a game
+        if self.state != PLAYING:
+            return
+
+        self.state = state
+        for listener in self.listeners:
+            listener(state == WON)
+
+    @instrument.timed('board.flag')
+    def flag(self, x, y):
+        # toggle flag on unrevealed tiles
+        if not self.revealed[x, y]:
+            self.flagged[x, y] = not self.flagged[x, y]
+
+        return self.flagged[x, y]
+
+    # same click interface as the gui, so solvers can drive either
+    def leftClicked(self, x, y):
+        self.leftClicks += 1
+        return self.reveal(x, y)
+
+    def rightClicked(self, x, y):
+        self.rightClicks += 1
+        return self.flag(x, y)
+
+    def chordClicked(self, x, y):
+        self.chordClicks += 1
+        return self.chord(x, y)
+
+    def efficiency(self):
+        # 3bv solved per click
+        clicks = self.leftClicks + self.rightClicks + self.chordClicks
+        return self.revealedTBV / clicks if clicks else 0.0
+
+    def lost(self):
+        return self.state == LOST
+
+    def won(self):
+        return self.state == WON
@@ -1,76 +1,73 @@
 import tkinter as tk
 import tkinter.ttk as ttk
 
-import random
-import json
+import argparse
+import os
 import time
 
-# file constants
-ADJACENT_TILES = [[-1, -1], [0, -1], [-1, 0], [1, -1], [-1, 1], [0, 1], [1, 0], [1, 1]]
+import instrument
+from env import PRESETS, Board, boardSize
+from noguess import NoGuessPool
+from stats import StatsLog
 
+# file constants
 BUTTON_CLICK = "<ButtonRelease-1>"
 BUTTON_FLAG = "<ButtonRelease-3>"
 
 
-# Minesweeper button extending tk button
+# Minesweeper button extending tk button, only renders the state kept on the board
 class MineButton(tk.Button):
     def __init__(self, parent, x, y, *args, **kwargs):
         tk.Button.__init__(self, parent, *args, **kwargs)
         self.parent = parent
 
-        self.num = 0
         self.x = x
         self.y = y
 
-        self.isFlagged = False
-        self.isMarked = False
-        self.isRevealed = False
-
-    def showNumber(self):
+    def showNumber(self, num):
         text = ""
-        if self.num == -1:
+        if num == -1:
             text = "*"
-        elif 1 <= self.num <= 8:
+        elif 1 <= num <= 8:
             # hex rgb colors for numbers
             buttonColors = ["#2904cf", "#077023", "#db1507", "#180b8c", "#801a16", "#11a697", "#000000", "#7f828a"]
-            self.configure(fg=buttonColors[self.num-1])
+            self.configure(fg=buttonColors[num-1])
 
-            text = f"{self.num}"
+            text = f"{num}"
         self.configure(text=text)
 
-        self.isRevealed = True
-
-    def flagTile(self):
-        if not self.isRevealed and not self.isFlagged:
-            self.isFlagged = True
+    def showFlag(self, flagged):
+        if flagged:
             self.configure(fg='#ff0000', text="Flag")
-        elif self.isFlagged:
-            self.isFlagged = False
+        else:
             self.configure(fg="#000000", text="")
 
-    def isMine(self):
-        return self.num == -1
-
 
 class MinesweeperEnv:
-    def __init__(self, master=None):
+    def __init__(self, master=None, difficulty='intermediate', length=None, height=None, mines=None, noGuess=False,
+                 poolPath=None, poolSize=20):
         # class constants
-        self.MINES = 40
-        self.LENGTH = 16
-        self.HEIGHT = 16
-        self.TILE_COORDINATES = [[x, y] for x in range(self.LENGTH) for y in range(self.HEIGHT)]
+        self.DIFFICULTY = difficulty
+        self.LENGTH, self.HEIGHT, self.MINES = boardSize(difficulty, length, height, mines)
 
         # game variables
-        self.tiles = [[MineButton for _ in range(self.LENGTH)] for _ in range(self.HEIGHT)]
+        self.board = Board(self.LENGTH, self.HEIGHT, self.MINES, firstClickSafe=True)
+        # the game ends on the board's terminal event, once the click that ended it is drawn
+        self.board.subscribe(lambda won: self.master.after_idle(self.gameEnd, won))
+        # no guess boards come from a pool and have to be opened on its start tile,
+        # the pool starts from the boards saved at poolPath (if any) and is topped up to poolSize while the gui is idle
+        self.pool = NoGuessPool(self.LENGTH, self.HEIGHT, self.MINES) if noGuess else None
+        self.poolPath = poolPath
+        self.poolSize = poolSize
+        self.filling = False
+        if self.pool is not None and poolPath is not None and os.path.exists(poolPath):
+            self.pool.load(poolPath)
+        self.tiles = [[MineButton for _ in range(self.HEIGHT)] for _ in range(self.LENGTH)]
         self.gameStarted = False
-        self.revealed = 0
-        self.tbv = 0
         self.time = 0
 
-        # stat tracking variables
-        self.leftClicks = 0
-        self.rightClicks = 0
-        self.gameStats = []
+        # stat tracking, click counts and revealed 3bv are kept on the board
+        self.stats = StatsLog("statistics.jsonl")
 
         # main ui
         self.master = master
@@ -96,7 +93,7 @@ class MinesweeperEnv:
 
         self.initBoard()
 
-    # initialize tiles as MineButton instances
+    # initialize tiles as MineButton instances, once per window
     def initBoard(self):
         for x in range(0, self.LENGTH):
             for y in range(0, self.HEIGHT):
@@ -110,209 +107,164 @@ class MinesweeperEnv:
 
                 self.tiles[x][y] = b
 
+        self.tileBackground = self.tiles[0][0].cget('background')
+
+    # put every tile back to its hidden look, the widgets and their bindings are kept for the next game
+    def clearTiles(self):
+        for row in self.tiles:
+            for mb in row:
+                mb.configure(background=self.tileBackground, fg="#000000", text='')
+
     def leftClickWrapper(self, x, y):
-        self.leftClicks += 1
-        return lambda button: self.leftClicked(self.tiles[x][y])
+        return lambda button: self.leftClicked(x, y)
 
     def rightClickWrapper(self, x, y):
-        self.rightClicks += 1
-        return lambda button: self.rightClicked(self.tiles[x][y])
+        return lambda button: self.rightClicked(x, y)
+
+    # live 3bv progress and efficiency, both kept up to date by the board
+    def updateStats(self):
+        self.TBVLabel.configure(text=f"3BV: {self.board.revealedTBV}/{self.board.tbv}")
+        self.efficiencyLabel.configure(text=f"Efficiency: {round(self.board.efficiency() * 100)}%")
+
+    # draw revealed tiles from the board state
+    def render(self, opened):
+        for x, y in opened:
+            mb = self.tiles[x][y]
+            if self.board.mines[x, y]:
+                mb.configure(background='#ff0000')
+            else:
+                mb.configure(background='#ffffff')
+            mb.showNumber(self.board.numbers[x, y])
+
+    def leftClicked(self, x, y):
+        # a left click on a revealed number chords
+        if self.board.revealed[x, y]:
+            return self.chordClicked(x, y)
 
-    def leftClicked(self, mb: MineButton):
         # start timer on first click
         if not self.gameStarted:
             self.gameStarted = True
             self.time = time.time()
 
-        if not mb.isFlagged:
-            if not mb.isRevealed and not mb.isMine():
-                mb.configure(background='#ffffff')
-                mb.showNumber()
-
-                # chord surrounding tiles
-                for dx, dy in ADJACENT_TILES:
-                    if 0 <= mb.x + dx < self.LENGTH and 0 <= mb.y + dy < self.HEIGHT:
-                        if mb.num == 0:
-                            self.leftClicked(self.tiles[mb.x + dx][mb.y + dy])
-
-                self.revealed += 1
-
-                if self.won():
-                    # win
-                    self.gameEnd(True)
-            elif mb.isMine():
-                # first click safety
-                if self.revealed == 0:
-                    # TODO: first click safety
-                    pass
-                else:
-                    mb.configure(background='#ff0000')
-                    mb.showNumber()
-                    # lose
-                    self.gameEnd(False)
-
-        # TODO: fix error in chording
-        # chording
-        elif mb.isRevealed:
-            print("attempted chording")
-            # count adjacent flags
-            c = 0
-            for dx, dy in ADJACENT_TILES:
-                if 0 <= mb.x + dx < self.LENGTH and 0 <= mb.y + dy < self.HEIGHT:
-                    if self.tiles[mb.x + dx][mb.y + dy].isFlagged:
-                        c += 1
-            if mb.num == c:
-                # reveal surrounding tiles
-                for dx, dy in ADJACENT_TILES:
-                    if 0 <= mb.x + dx < self.LENGTH and 0 <= mb.y + dy < self.HEIGHT:
-                        self.leftClicked(self.tiles[mb.x + dx][mb.y + dy])
-
-    def rightClicked(self, mb: MineButton):
+        # every click counts, even the ones that open nothing
+        opened = self.board.leftClicked(x, y)
+        self.afterClick(opened)
+        return opened
+
+    def chordClicked(self, x, y):
+        opened = self.board.chordClicked(x, y)
+        self.afterClick(opened)
+        return opened
+
+    def afterClick(self, opened):
+        self.render(opened)
+        self.updateStats()
+
+    def rightClicked(self, x, y):
         if not self.gameStarted:
             self.gameStarted = True
             self.time = time.time()
 
-        mb.flagTile()
+        self.board.rightClicks += 1
+        self.tiles[x][y].showFlag(self.board.flag(x, y))
+        self.updateStats()
 
     def placeMines(self):
-        # generate random coordinates for mines
-        randList = [divmod(i, self.HEIGHT)
-                    for i in random.sample(range(self.LENGTH * self.HEIGHT), self.MINES)]
-
-        # set as mine
-        for x, y in randList:
-            mb = self.tiles[x][y]
-            mb.num = -1
-            mb.isMarked = True
+        self.board.placeMines()
 
     def setNumbers(self):
-        for x, y in self.TILE_COORDINATES:
-            mb = self.tiles[x][y]
-            if mb.isMine():
-                # Skip cells that already contain a mine
-                continue
-
-            # Count the number of mines in the adjacent cells
-            count = 0
-            for dx, dy in ADJACENT_TILES:
-                if 0 <= x + dx < self.LENGTH and 0 <= y + dy < self.HEIGHT:
-                    if self.tiles[x + dx][y + dy].isMine():
-                        count += 1
-
-            if count != 0:
-                mb.num = count
+        self.board.setNumbers()
 
     def calcTBV(self):
-        """
-        Calculates the minimum number of clicks to solve the board (3BV)
-
-        Count3BV:
-            For each empty ("0") cell C:
-                If C has already been marked, continue.
-                Mark C. Add 1 to your 3BV count.
-                Call FloodFillMark(C).
-            For each non-marked, non-mine cell:
-                Add 1 to your 3BV count.
-
-        FloodFillMark(C):
-            For every non-marked neighbor N of C (diagonal and orthogonal):
-                Mark N.
-                If N is an empty cell, call FloodFillMark(N).
-        """
-
-        tbv = 0
-
-        for x, y in self.TILE_COORDINATES:
-            mb = self.tiles[x][y]
-
-            if mb.isMarked:
-                continue
-            elif mb.isMine():
-                mb.isMarked = True
-                continue
-            elif mb.num == 0:
-                mb.isMarked = True
-                tbv += 1
-                self.floodMark(x, y)
-
-        for x, y in self.TILE_COORDINATES:
-            mb = self.tiles[x][y]
-            if not mb.isMarked:
-                tbv += 1
-
-        return tbv
-
-    def floodMark(self, x, y):
-        for dx, dy in ADJACENT_TILES:
-            # prevent out of bounds
-            if 0 <= (x + dx) < self.LENGTH and 0 <= (y + dy) < self.HEIGHT:
-                mb = self.tiles[x + dx][y + dy]
-
-                if mb.isMarked:
-                    continue
-
-                mb.isMarked = True
-                if mb.num == 0:
-                    self.floodMark(x + dx, y + dy)
+        return self.board.calcTBV()
 
     def setup(self):
-        self.placeMines()
-        self.setNumbers()
-
-        self.tbv = self.calcTBV()
-
-        self.TBVLabel.configure(text=f"3BV: {str(self.tbv)}")
+        if self.pool is not None:
+            self.pool.get(self.board)
+            x, y = self.pool.start
+            self.tiles[x][y].configure(background='#b6f2b6')
+            if not self.filling:
+                self.filling = True
+                self.master.after_idle(self.fillPool)
+        else:
+            self.board.setup()
+
+        self.updateStats()
+
+    def fillPool(self):
+        # one board per idle call, so clicks are still handled while the pool fills
+        if len(self.pool) < self.poolSize:
+            self.pool.fill(len(self.pool) + 1)
+            self.master.after_idle(self.fillPool)
+        else:
+            self.filling = False
+
+    def savePool(self):
+        if self.pool is not None and self.poolPath is not None:
+            self.pool.save(self.poolPath)
 
     def resetEnv(self):
-        self.initBoard()
+        self.clearTiles()
 
         self.gameStarted = False
         self.time = 0
-        self.revealed = 0
-        self.leftClicks = 0
-        self.rightClicks = 0
 
         self.setup()
 
     def won(self):
-        return self.revealed == self.LENGTH * self.HEIGHT - self.MINES
+        return self.board.won()
 
     def gameEnd(self, won: bool):
+        board = self.board
+
         # compile stats for this board
-        # 3bv
-        # TODO: calculate 3bv of revealed tiles
         # time
         self.time = round((time.time() - self.time), 3)
-        # 3bv/s
-        # TODO: division by zero error
-        tbvPerSec = round(self.tbv / self.time, 4)
-        # TODO: efficiency --> clicks used / 3bv (revealed or complete)
+        # 3bv/s of the revealed 3bv
+        tbvPerSec = round(board.revealedTBV / self.time, 4) if self.time > 0 else 0.0
+        # efficiency --> revealed 3bv / clicks used
+        efficiency = round(board.efficiency(), 4)
 
         # game stats as dict
-        currentGameStats = {"won": won, "time": self.time, "3bv": self.tbv, "3bv/s": tbvPerSec, "clicks": {"left": self.leftClicks, "right": self.rightClicks}}
-
-        self.gameStats.append(currentGameStats)
+        currentGameStats = {"won": won, "difficulty": self.DIFFICULTY, "time": self.time, "3bv": board.tbv, "revealed 3bv": board.revealedTBV, "3bv/s": tbvPerSec,
+                            "efficiency": efficiency, "clicks": {"left": board.leftClicks, "right": board.rightClicks, "chord": board.chordClicks}}
 
-        # dump stats into json after each episode
-        with open("statistics.json", 'r+') as f:
-            data = json.load(f)
-            for value in self.gameStats:
-                data["statistics"].append(value)
-            f.seek(0)
+        # hot path timings of this game, when instrumentation is enabled
+        if instrument.ENABLED:
+            currentGameStats["profile"] = instrument.summary()
+            instrument.reset()
 
-            json.dump(data, f, indent=4)
+        # one line per game, written out in batches
+        self.stats.append(currentGameStats)
 
         self.resetEnv()
 
+    # let a solver play through the gui, one move per tick
+    def autoplay(self, solver, delay=50):
+        solver.step()
+        self.master.after(delay, self.autoplay, solver, delay)
+
     def run(self):
         self.setup()
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Minesweeper')
+    parser.add_argument('-d', '--difficulty', choices=list(PRESETS) + ['custom'], default='intermediate')
+    parser.add_argument('--length', type=int, help='board length for custom boards')
+    parser.add_argument('--height', type=int, help='board height for custom boards')
+    parser.add_argument('--mines', type=int, help='mine count for custom boards')
+    parser.add_argument('--no-guess', action='store_true', help='only deal boards the solver finishes without guessing')
+    parser.add_argument('--pool', help='file the no guess boards are loaded from at startup and saved to on exit')
+    parser.add_argument('--pool-size', type=int, default=20, help='no guess boards kept ready while playing')
+    args = parser.parse_args()
+
     root = tk.Tk()
     root.title('Minesweeper')
-    root.geometry('850x625')
+    # the window fits itself around the grid
     root.resizable(False, False)
-    app = MinesweeperEnv(root)
+    app = MinesweeperEnv(root, args.difficulty, args.length, args.height, args.mines, args.no_guess, args.pool,
+                         args.pool_size)
     app.run()
     root.mainloop()
+    app.savePool()
@@ -0,0 +1,112 @@
+import argparse
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+import instrument
+from env import PRESETS, Board, boardSize
+from agent import Solver
+from patterns import TABLE, PatternCache
+
+
+def playBoards(args):
+    """
+    Plays boards start to stop of the run, board i is seeded seed << 32 | i so any split of the range gives the same games.
+    Returns won, 3bv, solve time, guesses, efficiency and moves per board, and the instrumentation counters.
+    """
+
+    start, stop, seed, length, height, mines, backend, firstClickSafe, chord, patterns = args
+    board = Board(length, height, mines, firstClickSafe)
+    # patterns is the directory of a window table, shared by the solvers of the job through one cache
+    cache = PatternCache(table=patterns) if patterns else None
+    results = np.zeros((stop - start, 6))
+    instrument.reset()
+
+    for i in range(start, stop):
+        board.setup(seed << 32 | i)
+
+        # chording needs the mines flagged first
+        solver = Solver(board, flagMines=chord, backend=backend, seed=seed << 32 | i, chord=chord,
+                        patterns=cache)
+        t = time.perf_counter()
+        won = solver.solve()
+        # the 3bv is known once the mines are placed, after the first click on first click safe boards
+        results[i - start] = won, board.tbv, time.perf_counter() - t, solver.guesses, board.efficiency(), solver.moves
+
+    return results, instrument.snapshot()
+
+
+def runHarness(games, length, height, mines, seed=0, workers=None, backend='constraints', chunk=100, firstClickSafe=True,
+               chord=False, patterns=None):
+    workers = workers or os.cpu_count()
+    jobs = [(start, min(start + chunk, games), seed, length, height, mines, backend, firstClickSafe, chord, patterns)
+            for start in range(0, games, chunk)]
+
+    t = time.perf_counter()
+    if workers == 1:
+        results = [playBoards(job) for job in jobs]
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            results = pool.map(playBoards, jobs)
+    elapsed = time.perf_counter() - t
+
+    instrument.reset()
+    for _, counters in results:
+        instrument.merge(counters)
+
+    results = np.concatenate([boards for boards, _ in results])
+    won, tbv, seconds, guesses, efficiency, moves = results.T
+    won = won.astype(bool)
+
+    return {
+        "games": games,
+        "win rate": float(won.mean()),
+        "mean 3bv": float(tbv.mean()),
+        # 3bv/s only counts solved boards, like a player's record
+        "3bv/s": float((tbv[won] / seconds[won]).mean()) if won.any() else 0.0,
+        "guesses": float(guesses.mean()),
+        "efficiency": float(efficiency.mean()),
+        "moves": float(moves.mean()),
+        "boards/s": games / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Play seeded boards with the solver and report its win rate')
+    parser.add_argument('-n', '--games', type=int, default=1000)
+    parser.add_argument('-d', '--difficulty', choices=list(PRESETS) + ['custom'], default='expert')
+    parser.add_argument('--length', type=int, help='board length for custom boards')
+    parser.add_argument('--height', type=int, help='board height for custom boards')
+    parser.add_argument('--mines', type=int, help='mine count for custom boards')
+    parser.add_argument('-s', '--seed', type=int, default=0)
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count())
+    parser.add_argument('-b', '--backend', choices=Solver.BACKENDS, default='constraints')
+    parser.add_argument('--chunk', type=int, default=100, help='boards per job handed to a worker')
+    parser.add_argument('--unsafe-first-click', action='store_true', help='place mines before the first click')
+    parser.add_argument('--chord', action='store_true', help='flag mines and open safe tiles by chording where it pays off')
+    parser.add_argument('--patterns', nargs='?', const=TABLE, metavar='DIR',
+                        help='look up local windows in a pattern cache, backed by the table in DIR if it is built')
+    args = parser.parse_args()
+
+    try:
+        length, height, mines = boardSize(args.difficulty, args.length, args.height, args.mines)
+    except ValueError as e:
+        parser.error(str(e))
+
+    stats = runHarness(args.games, length, height, mines, args.seed, args.workers, args.backend, args.chunk,
+                       not args.unsafe_first_click, args.chord, args.patterns)
+
+    print(f"{args.difficulty} {length}x{height} with {mines} mines, {args.backend} backend, {args.workers} workers")
+    for key, value in stats.items():
+        print(f"{key + ':':<12} {value:.4f}" if isinstance(value, float) else f"{key + ':':<12} {value}")
+
+    if instrument.ENABLED:
+        print()
+        for name, entry in instrument.summary().items():
+            print(f"{name:<24} {entry['calls']:>10} calls {entry['total ms']:>12.1f} ms {entry['mean us']:>10.1f} us/call")
+
+
+if __name__ == '__main__':
+    main()
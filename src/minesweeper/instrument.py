@@ -0,0 +1,77 @@
+import functools
+import os
+import time
+
+# instrumentation is decided once, at import: with MINESWEEPER_PROFILE unset the decorators return the functions untouched
+ENABLED = os.environ.get('MINESWEEPER_PROFILE', '') not in ('', '0')
+
+# histogram buckets are powers of two nanoseconds, bucket b holds calls shorter than 2 ** b ns
+BUCKETS = 40
+
+# name -> [calls, total ns, histogram]
+counters = {}
+
+
+def timed(name):
+    """
+    Decorator counting the calls of a hot path function and their latency, under name.
+    A no-op unless instrumentation is enabled.
+    """
+
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+
+        entry = counters.setdefault(name, [0, 0, [0] * BUCKETS])
+        histogram = entry[2]
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            t = time.perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                ns = time.perf_counter_ns() - t
+                entry[0] += 1
+                entry[1] += ns
+                histogram[min(ns.bit_length(), BUCKETS - 1)] += 1
+
+        return wrapper
+
+    return decorate
+
+
+def snapshot():
+    # plain copies of the counters, to send between processes
+    return {name: [calls, total, list(histogram)] for name, (calls, total, histogram) in counters.items()}
+
+
+def merge(other):
+    for name, (calls, total, histogram) in other.items():
+        entry = counters.setdefault(name, [0, 0, [0] * BUCKETS])
+        entry[0] += calls
+        entry[1] += total
+        entry[2][:] = [a + b for a, b in zip(entry[2], histogram)]
+
+
+def reset():
+    for entry in counters.values():
+        entry[0] = entry[1] = 0
+        entry[2][:] = [0] * BUCKETS
+
+
+def summary():
+    """
+    Calls, total and mean time and the latency histogram of every instrumented function that ran.
+    The histogram maps the upper bound of every non empty bucket (in microseconds) to its number of calls.
+    """
+
+    return {
+        name: {
+            "calls": calls,
+            "total ms": round(total / 1e6, 3),
+            "mean us": round(total / calls / 1e3, 3),
+            "histogram us": {f"<{2 ** b / 1e3:g}": count for b, count in enumerate(histogram) if count},
+        }
+        for name, (calls, total, histogram) in counters.items() if calls
+    }
@@ -0,0 +1,84 @@
+import collections
+
+import numpy as np
+
+from env import Board, countNeighbors
+from agent import Solver
+
+
+class NoGuessPool:
+    """
+    Boards the built in solver finishes without a single guess when started on a fixed tile.
+    Candidates are generated first click safe around that tile and kept only if the solver never has to guess,
+    so the validation cost is paid by fill (ahead of time, or saved to disk) instead of during play.
+    Boards are kept as their mine masks with the numbers, so dealing one does not count them again.
+    """
+
+    def __init__(self, length=16, height=16, mines=40, start=None, seed=None, maxTries=10000):
+        self.LENGTH = length
+        self.HEIGHT = height
+        self.MINES = mines
+        self.start = start if start is not None else (length // 2, height // 2)
+        self.rng = np.random.default_rng(seed)
+        self.maxTries = maxTries
+
+        self.pool = collections.deque()
+        self.tries = 0
+
+    def generate(self):
+        board = Board(self.LENGTH, self.HEIGHT, self.MINES)
+
+        for _ in range(self.maxTries):
+            self.tries += 1
+            board.clear()
+            board.generate(self.rng, self.start)
+
+            solver = Solver(board, flagMines=False)
+            solver.update(board.reveal(*self.start))
+            while solver.guesses == 0 and solver.step():
+                pass
+
+            if solver.guesses == 0 and board.won():
+                return board.mines.copy(), board.numbers.copy()
+
+        raise RuntimeError(f"no guess free board found in {self.maxTries} tries")
+
+    def __len__(self):
+        return len(self.pool)
+
+    def fill(self, n):
+        while len(self.pool) < n:
+            self.pool.append(self.generate())
+
+    def get(self, board=None):
+        """
+        Loads the next board of the pool (generating one if the pool is empty) into board, or a new Board.
+        The board has to be opened on pool.start.
+        """
+
+        mines, numbers = self.pool.popleft() if self.pool else self.generate()
+        if board is None:
+            board = Board(self.LENGTH, self.HEIGHT, self.MINES)
+        board.clear()
+        board.load(mines, self.start, numbers)
+        # the layout does not come from a seed the board may still hold
+        board.seed = None
+
+        return board
+
+    def save(self, path):
+        # only the masks are saved, load counts the numbers of all of them at once
+        masks = np.array([mines for mines, _ in self.pool], dtype=bool).reshape(len(self.pool), -1)
+        np.savez_compressed(path, masks=np.packbits(masks, axis=1), shape=[self.LENGTH, self.HEIGHT, self.MINES],
+                            start=self.start)
+
+    def load(self, path):
+        data = np.load(path)
+        if list(data['shape']) != [self.LENGTH, self.HEIGHT, self.MINES] or tuple(data['start']) != tuple(self.start):
+            raise ValueError(f"{path} holds boards for another size or start tile")
+
+        masks = np.unpackbits(data['masks'], axis=1, count=self.LENGTH * self.HEIGHT).astype(bool)
+        masks = masks.reshape(-1, self.LENGTH, self.HEIGHT)
+        numbers = countNeighbors(masks)
+        numbers[masks] = -1
+        self.pool.extend(zip(masks, numbers))
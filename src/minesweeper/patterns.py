@@ -0,0 +1,204 @@
+import collections
+import os
+
+import numpy as np
+
+from sat import SatBackend
+
+# windows are WINDOW x WINDOW tiles centered on a frontier number, flattened row by row
+WINDOW = 5
+RADIUS = WINDOW // 2
+
+# window values: 0-8 are the mines still missing around a revealed number of the inner 3x3,
+# every other tile is either unknown or can not matter (revealed further out, known, off the board)
+UNKNOWN = 9
+OTHER = 10
+
+# window positions of the inner 3x3, the only ones that hold numbers
+INNER = {r * WINDOW + c for r in range(1, WINDOW - 1) for c in range(1, WINDOW - 1)}
+
+# where patterntable.py writes the table and the shared cache looks for it, MINESWEEPER_PATTERNS points elsewhere
+TABLE = os.environ.get('MINESWEEPER_PATTERNS',
+                       os.path.join(os.path.dirname(os.path.abspath(__file__)), 'patterntable_data'))
+
+
+def symmetries(size):
+    # the 8 rotations and reflections of a size x size window, as index permutations
+    perms = []
+    for transpose in (False, True):
+        for flipRows in (False, True):
+            for flipCols in (False, True):
+                perm = []
+                for r in range(size):
+                    for c in range(size):
+                        i, j = (c, r) if transpose else (r, c)
+                        i = size - 1 - i if flipRows else i
+                        j = size - 1 - j if flipCols else j
+                        perm.append(i * size + j)
+                perms.append(perm)
+
+    return perms
+
+
+SYMMETRIES = symmetries(WINDOW)
+
+
+def canonical(window):
+    """
+    The smallest of the 8 symmetric images of a window, as bytes, and the permutation that produced it:
+    tile i of the canonical window is tile perm[i] of the given one.
+    """
+
+    best = None
+    for perm in SYMMETRIES:
+        key = bytes([window[i] for i in perm])
+        if best is None or key < best[0]:
+            best = key, perm
+
+    return best
+
+
+def solveWindow(window, nodeBudget=10000):
+    """
+    Tiles of a window that are forced safe or forced mines by the numbers of its inner 3x3.
+    Those numbers only see tiles inside the window, so whatever follows from them holds on the whole board.
+    Returns the safe and the mine window positions.
+    """
+
+    constraints = []
+    for r in range(1, WINDOW - 1):
+        for c in range(1, WINDOW - 1):
+            needs = window[r * WINDOW + c]
+            if needs >= UNKNOWN:
+                continue
+
+            cells = [i * WINDOW + j for i in range(r - 1, r + 2) for j in range(c - 1, c + 2)
+                     if window[i * WINDOW + j] == UNKNOWN]
+            constraints.append((cells, needs))
+
+    return SatBackend(nodeBudget).forced(constraints)
+
+
+def packKey(key):
+    # a canonical window as one integer: 4 bits per inner tile, 1 bit (unknown or not) per outer tile
+    packed = 0
+    for i, value in enumerate(key):
+        packed = packed << 4 | value if i in INNER else packed << 1 | (value == UNKNOWN)
+    return packed
+
+
+def positions(mask):
+    return [i for i in range(WINDOW * WINDOW) if mask >> i & 1]
+
+
+class PatternTable:
+    """
+    Precomputed window deductions on disk: sorted packed keys (keys.npy) with bitmasks of the forced safe
+    (safe.npy) and forced mine (mines.npy) positions. The arrays are memory mapped, so loading is instant and
+    a lookup is a binary search that only touches the pages it needs.
+    """
+
+    def __init__(self, keys, safe, mines):
+        self.keys = keys
+        self.safe = safe
+        self.mines = mines
+
+    @classmethod
+    def fromEntries(cls, entries):
+        # entries maps canonical windows to their (safe, mines) positions, as PatternCache keeps them
+        keys = np.array([packKey(key) for key in entries], dtype=np.uint64)
+        safe = np.array([sum(1 << i for i in result[0]) for result in entries.values()], dtype=np.uint32)
+        mines = np.array([sum(1 << i for i in result[1]) for result in entries.values()], dtype=np.uint32)
+
+        order = np.argsort(keys)
+        return cls(keys[order], safe[order], mines[order])
+
+    @classmethod
+    def load(cls, directory=TABLE, mmap=True):
+        mode = 'r' if mmap else None
+        return cls(*(np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mode) for name in ('keys', 'safe', 'mines')))
+
+    def save(self, directory=TABLE):
+        os.makedirs(directory, exist_ok=True)
+        for name in ('keys', 'safe', 'mines'):
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def get(self, key):
+        # the (safe, mines) positions of a canonical window, None when the table does not have it
+        packed = packKey(key)
+        i = int(np.searchsorted(self.keys, np.uint64(packed)))
+        if i == len(self.keys) or int(self.keys[i]) != packed:
+            return None
+
+        return positions(int(self.safe[i])), positions(int(self.mines[i]))
+
+
+class PatternCache:
+    """
+    Deductions for local frontier windows, keyed by the canonical window so that rotated and
+    reflected copies of a pattern (a 1-2-1 along any wall) share one entry.
+    Entries are kept in least recently used order and the oldest is dropped past maxSize.
+    Windows missing from the cache are looked up in the precomputed table (if any) before they are solved.
+    The table is a PatternTable, or the directory of one, loaded on the first lookup that needs it (if it exists).
+    """
+
+    def __init__(self, maxSize=100000, nodeBudget=10000, table=None):
+        self.maxSize = maxSize
+        self.nodeBudget = nodeBudget
+        self.table = table
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.tableHits = 0
+        self.misses = 0
+
+    def lookup(self, window):
+        """
+        Returns the safe and the mine positions of a window (a sequence of WINDOW * WINDOW values),
+        solving and storing it on a miss.
+        """
+
+        key, perm = canonical(window)
+
+        result = self.entries.get(key)
+        if result is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        else:
+            table = self.loadTable()
+            result = table.get(key) if table is not None else None
+            if result is not None:
+                self.tableHits += 1
+            else:
+                self.misses += 1
+                result = solveWindow(key, self.nodeBudget)
+
+            self.entries[key] = result
+            if len(self.entries) > self.maxSize:
+                self.entries.popitem(last=False)
+
+        safe, mines = result
+        return [perm[i] for i in safe], [perm[i] for i in mines]
+
+    def loadTable(self):
+        if isinstance(self.table, str):
+            found = os.path.exists(os.path.join(self.table, 'keys.npy'))
+            self.table = PatternTable.load(self.table) if found else None
+        return self.table
+
+    def hitRate(self):
+        # lookups answered without solving, from the cache or the table
+        lookups = self.hits + self.tableHits + self.misses
+        return (self.hits + self.tableHits) / lookups if lookups else 0.0
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.tableHits = 0
+        self.misses = 0
+
+
+# one cache for every solver of a process, patterns repeat across boards, backed by the built table if there is one
+sharedCache = PatternCache(table=TABLE)
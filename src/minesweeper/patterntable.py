@@ -0,0 +1,74 @@
+import argparse
+import itertools
+import time
+
+import numpy as np
+
+from env import ADJACENT_TILES, PRESETS, Board
+from agent import Solver
+from patterns import OTHER, TABLE, UNKNOWN, WINDOW, PatternCache, PatternTable
+
+# roles of an inner tile while enumerating: hidden safe, hidden mine, revealed number, or known
+SAFE, MINE, NUMBER, KNOWN = range(4)
+
+
+def enumerateInner(cache):
+    """
+    Every consistent window whose numbers only see the inner 3x3, the outer ring being known:
+    each inner tile is hidden (safe or a mine), a revealed number or known, the center is a number,
+    and every number is the count of the hidden mines around it, like setNumbers counts them.
+    """
+
+    inner = [(r, c) for r in range(1, WINDOW - 1) for c in range(1, WINDOW - 1)]
+    center = inner.index((WINDOW // 2, WINDOW // 2))
+
+    for roles in itertools.product(range(4), repeat=len(inner)):
+        if roles[center] != NUMBER:
+            continue
+
+        role = {tile: roles[i] for i, tile in enumerate(inner)}
+        window = [OTHER] * (WINDOW * WINDOW)
+        for (r, c), kind in role.items():
+            if kind == NUMBER:
+                window[r * WINDOW + c] = sum(role.get((r + dx, c + dy)) == MINE for dx, dy in ADJACENT_TILES)
+            elif kind != KNOWN:
+                window[r * WINDOW + c] = UNKNOWN
+
+        # only frontier numbers are looked up
+        if any(role.get((WINDOW // 2 + dx, WINDOW // 2 + dy)) in (SAFE, MINE) for dx, dy in ADJACENT_TILES):
+            cache.lookup(window)
+
+
+def harvest(cache, boards, seed):
+    # the 5x5 windows are far too many to enumerate, so the ones that come up while solving boards are kept
+    for difficulty, (length, height, mines) in PRESETS.items():
+        board = Board(length, height, mines, firstClickSafe=True)
+        for i in range(boards):
+            board.setup(seed << 32 | i)
+            Solver(board, flagMines=False, seed=seed << 32 | i, patterns=cache).solve()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the window table pattern caches look windows up in')
+    parser.add_argument('-n', '--boards', type=int, default=2000, help='boards solved per difficulty to harvest windows')
+    parser.add_argument('-s', '--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', default=TABLE, help='directory the table is written to')
+    args = parser.parse_args()
+
+    cache = PatternCache(maxSize=float('inf'), table=None)
+
+    t = time.perf_counter()
+    enumerateInner(cache)
+    inner = len(cache.entries)
+    harvest(cache, args.boards, args.seed)
+
+    table = PatternTable.fromEntries(cache.entries)
+    table.save(args.output)
+
+    forced = np.count_nonzero(table.safe | table.mines)
+    print(f"{len(table)} windows ({inner} enumerated, {len(table) - inner} harvested), {forced} with forced tiles, "
+          f"built in {time.perf_counter() - t:.1f}s, written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
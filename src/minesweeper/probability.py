@@ -0,0 +1,320 @@
+import math
+import random
+
+import numpy as np
+
+import instrument
+
+
+class BudgetExceeded(Exception):
+    pass
+
+
+def logComb(n, k):
+    return math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1)
+
+
+def splitComponents(constraints):
+    """
+    Splits (tiles, mines) constraints into groups that share no tiles.
+    """
+
+    # union find over the tiles of each constraint
+    parent = {}
+
+    def find(c):
+        while parent[c] != c:
+            parent[c] = parent[parent[c]]
+            c = parent[c]
+        return c
+
+    for cells, _ in constraints:
+        for c in cells:
+            parent.setdefault(c, c)
+        root = find(cells[0])
+        for c in cells[1:]:
+            parent[find(c)] = root
+
+    groups = {}
+    for cells, mines in constraints:
+        groups.setdefault(find(cells[0]), []).append((cells, mines))
+
+    return list(groups.values())
+
+
+def componentOrder(constraints):
+    """
+    Orders the tiles of a component constraint by constraint, so every constraint is open over a short stretch.
+    Returns the tiles, the constraints of every tile, and the first and last position of every constraint.
+    """
+
+    # constraints are taken breadth first from one with few neighbors, so the ones sharing tiles come close together
+    sharing = {}
+    for j, (cells, _) in enumerate(constraints):
+        for c in cells:
+            sharing.setdefault(c, []).append(j)
+    order = [min(range(len(constraints)), key=lambda j: sum(len(sharing[c]) for c in constraints[j][0]))]
+    visited = set(order)
+    for j in order:
+        for c in constraints[j][0]:
+            for k in sharing[c]:
+                if k not in visited:
+                    visited.add(k)
+                    order.append(k)
+
+    tiles = []
+    seen = set()
+    for j in order:
+        for c in constraints[j][0]:
+            if c not in seen:
+                seen.add(c)
+                tiles.append(c)
+    index = {c: i for i, c in enumerate(tiles)}
+    n = len(tiles)
+
+    members = [[] for _ in range(n)]
+    first = [n] * len(constraints)
+    last = [-1] * len(constraints)
+    for j, (cells, _) in enumerate(constraints):
+        for c in cells:
+            i = index[c]
+            members[i].append(j)
+            first[j] = min(first[j], i)
+            last[j] = max(last[j], i)
+
+    return tiles, index, members, first, last
+
+
+class ProbabilityEngine:
+    """
+    Exact mine probabilities for the unknown tiles of a board.
+    The frontier (unknown tiles next to a revealed number) is split into independent components, each component
+    is counted with a dynamic program over its tiles that gives its solutions by number of mines, and the
+    components are combined with the binomial weight of spreading the remaining mines over the other unknown tiles.
+    A component with more than maxTiles tiles, more than nodeBudget states or more than maxEntries stored counts
+    is sampled instead, so the work and memory per call stay bounded.
+    """
+
+    def __init__(self, nodeBudget=100000, samples=500, seed=None, maxTiles=1000, maxEntries=1 << 22):
+        self.nodeBudget = nodeBudget
+        self.samples = samples
+        self.maxTiles = maxTiles
+        self.maxEntries = maxEntries
+        self.rng = random.Random(seed)
+        # exact results of the last call by component, most components are unchanged from one guess to the next
+        self.previous = {}
+
+    def enumerate(self, constraints):
+        """
+        Counts the solutions of one component.
+        The state between two tiles is what the constraints open there still need; a forward pass keeps the
+        solution counts by number of mines of every state, a backward pass over the same states then adds up
+        the solutions in which each tile is a mine, one tile at a time.
+        Returns the tiles, the number of solutions per mine count (counts[k]), the mine counts that have
+        solutions (ks) and per tile (cells[r][i], solutions with ks[r] mines where tile i is a mine).
+        """
+
+        tiles, index, members, first, last = componentOrder(constraints)
+        n = len(tiles)
+        if n > self.maxTiles:
+            raise BudgetExceeded
+
+        # unassigned tiles left in each constraint after tile i, and constraints open between tile i - 1 and i
+        remaining = [[sum(1 for c in constraints[j][0] if index[c] > i) for j in members[i]] for i in range(n)]
+        opened = [[j for j in range(len(constraints)) if first[j] < i <= last[j]] for i in range(n + 1)]
+
+        # how tile i reads the state before it and builds the state after it, worked out once per tile:
+        # the need of every member constraint is a state slot, or its full count when it opens at tile i (slot -1),
+        # and every slot of the next state is taken the same way, less the mine for the members of tile i
+        reads = []
+        writes = []
+        for i in range(n):
+            slot = {j: k for k, j in enumerate(opened[i])}
+            member = set(members[i])
+            reads.append([(slot.get(j, -1), constraints[j][1], left) for j, left in zip(members[i], remaining[i])])
+            writes.append([(slot.get(j, -1), constraints[j][1], j in member) for j in opened[i + 1]])
+
+        # layers[i] maps the states before tile i to their solution counts by mines among the tiles before i
+        layers = [{(): np.ones(1)}]
+        steps = []
+        nodes = stored = 0
+        for i in range(n):
+            after = {}
+            moves = []
+            for state, poly in layers[i].items():
+                needs = [state[k] if k >= 0 else count for k, count, _ in reads[i]]
+                lefts = [left for _, _, left in reads[i]]
+                base = [state[k] if k >= 0 else count for k, count, _ in writes[i]]
+
+                for mine in (0, 1):
+                    if not all(0 <= need - mine <= left for need, left in zip(needs, lefts)):
+                        continue
+
+                    nextState = tuple(value - mine if isMember else value
+                                      for value, (_, _, isMember) in zip(base, writes[i])) if mine else tuple(base)
+                    moves.append((state, mine, nextState))
+                    if nextState not in after:
+                        after[nextState] = np.zeros(i + 2)
+                    after[nextState][mine:mine + i + 1] += poly
+
+            nodes += len(after)
+            stored += len(after) * (i + 2)
+            if nodes > self.nodeBudget or stored > self.maxEntries:
+                raise BudgetExceeded
+
+            layers.append(after)
+            steps.append(moves)
+
+        counts = layers[n].get((), np.zeros(n + 1))
+        ks = np.flatnonzero(counts)
+        cells = np.zeros((ks.size, n))
+
+        # back maps the states before tile i + 1 to their solution counts by mines among the tiles from i + 1 on
+        back = {(): np.ones(1)}
+        for i in range(n - 1, -1, -1):
+            before = {}
+            column = np.zeros(n + 1)
+            for state, mine, nextState in steps[i]:
+                tail = back.get(nextState)
+                if tail is None:
+                    continue
+                if state not in before:
+                    before[state] = np.zeros(n - i + 1)
+                before[state][mine:mine + n - i] += tail
+                if mine:
+                    column[1:] += np.convolve(layers[i][state], tail)
+
+            cells[:, i] = column[ks]
+            back = before
+            layers[i + 1] = None
+
+        return tiles, counts, ks, cells
+
+    def sample(self, constraints):
+        """
+        Estimates the same counts as enumerate from random solutions of the component, each found with
+        a randomized backtracking search over the tiles in constraint order.
+        The searches share nodeBudget (but get at least a few nodes per tile), fewer samples are drawn on large
+        components to stay within it, and a search that runs out of nodes gives up on its sample.
+        """
+
+        tiles, index, members, _, _ = componentOrder(constraints)
+        n = len(tiles)
+        sizes = [len(cells) for cells, _ in constraints]
+
+        budget = max(4 * n, self.nodeBudget // max(1, self.samples))
+        samples = max(1, min(self.samples, self.nodeBudget // budget))
+
+        counts = np.zeros(n + 1)
+        rows = {}
+        for _ in range(samples):
+            needs = [mines for _, mines in constraints]
+            free = list(sizes)
+            values = []
+            pending = [self.rng.sample((0, 1), 2)]
+            nodes = 0
+
+            # depth first with an explicit stack: pending[k] holds the values tile k has left to try
+            while len(values) < n:
+                k = len(values)
+                if not pending[k] or nodes > budget:
+                    pending.pop()
+                    if not values or nodes > budget:
+                        break
+                    mine = values.pop()
+                    for j in members[k - 1]:
+                        needs[j] += mine
+                        free[j] += 1
+                    continue
+
+                nodes += 1
+                mine = pending[k].pop()
+                for j in members[k]:
+                    needs[j] -= mine
+                    free[j] -= 1
+                if all(0 <= needs[j] <= free[j] for j in members[k]):
+                    values.append(mine)
+                    pending.append(self.rng.sample((0, 1), 2))
+                else:
+                    for j in members[k]:
+                        needs[j] += mine
+                        free[j] += 1
+
+            if len(values) == n:
+                k = sum(values)
+                counts[k] += 1
+                if k not in rows:
+                    rows[k] = np.zeros(n)
+                rows[k] += values
+
+        ks = np.array(sorted(rows), dtype=np.intp)
+        cells = np.array([rows[k] for k in ks]).reshape(ks.size, n)
+        return tiles, counts, ks, cells
+
+    @instrument.timed('probability.calculate')
+    def calculate(self, constraints, unknown, minesLeft):
+        """
+        Takes the frontier constraints as (tiles, mines) pairs, every unknown tile and the number of mines left.
+        Returns the mine probability of each unknown tile and whether the result is exact.
+        """
+
+        exact = True
+        results = []
+        known = {}
+        for component in splitComponents([(list(cells), mines) for cells, mines in constraints if cells]):
+            key = tuple(sorted((tuple(sorted(cells)), mines) for cells, mines in component))
+            result = self.previous.get(key)
+            if result is None:
+                try:
+                    result = self.enumerate(component)
+                except BudgetExceeded:
+                    exact = False
+                    results.append(self.sample(component))
+                    continue
+            known[key] = result
+            results.append(result)
+        self.previous = known
+
+        frontier = {c for tiles, _, _, _ in results for c in tiles}
+        others = [c for c in unknown if c not in frontier]
+        rest = len(others)
+
+        # mine count distribution over all components together, and with each component left out
+        def product(polys):
+            total = np.ones(1)
+            for poly in polys:
+                total = np.convolve(total, poly)
+            return total
+
+        counts = [result[1] for result in results]
+        total = product(counts)
+
+        # relative binomial weight of leaving s mines for the other tiles, kept in log space
+        def weights(size):
+            logs = np.array([logComb(rest, minesLeft - s) if 0 <= minesLeft - s <= rest else -np.inf for s in range(size)])
+            if np.isneginf(logs).all():
+                return np.zeros(size)
+            return np.exp(logs - logs.max())
+
+        weight = weights(total.size)
+        z = total @ weight
+        if z <= 0:
+            # the constraints can not be met with the mines left (only possible when sampling)
+            p = minesLeft / len(unknown) if unknown else 0
+            return {c: p for c in unknown}, False
+
+        probabilities = {}
+        for j, (tiles, _, ks, cells) in enumerate(results):
+            without = product(counts[:j] + counts[j + 1:])
+            # weight of a component solution with k mines, summed over everything else
+            perK = np.array([without @ weight[k:k + without.size] for k in ks])
+            for c, p in zip(tiles, perK @ cells / z):
+                probabilities[c] = float(p)
+
+        if rest:
+            expected = np.arange(total.size)
+            p = float((total * weight) @ (minesLeft - expected) / z / rest)
+            for c in others:
+                probabilities[c] = p
+
+        return probabilities, exact
@@ -0,0 +1,228 @@
+import os
+
+import numpy as np
+
+from env import Board
+
+# move actions, stored in the low two bits of every move
+REVEAL = 0
+FLAG = 1
+CHORD = 2
+
+MAGIC = b'MSR2'
+
+# header flags
+HAS_SEED = 1
+HAS_MASK = 2
+SAFE_FIRST = 4      # made safe for the first revealed tile
+
+
+def writeVarint(out, value):
+    while value >= 0x80:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def readVarint(data, pos):
+    value = shift = 0
+    while True:
+        if pos >= len(data):
+            raise ValueError("truncated replay")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+# signed to unsigned, small either way: 0, -1, 1, -2, 2 ... become 0, 1, 2, 3, 4 ...
+def zigzag(value):
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+
+def unzigzag(value):
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+def firstReveal(moves):
+    return next(((x, y) for action, x, y in moves if action == REVEAL), None)
+
+
+def encodeGame(board, moves, includeMask=True):
+    """
+    Packs a board and its moves into bytes.
+    The board is its dimensions, mine count, seed (when known) and the bit packed mine mask;
+    the mask can be left out for seeded boards, which are then regenerated from the seed on replay,
+    first click safe ones around their first revealed tile.
+    Every move is a varint of (zigzagged tile index difference to the previous move << 2 | action),
+    so the short hops between the moves of a game mostly fit in one byte.
+    """
+
+    # a first click safe layout can only be regenerated when it was made safe for the first revealed tile
+    includeMask = includeMask or board.seed is None or board.safeTile not in (None, firstReveal(moves))
+    flags = (HAS_SEED if board.seed is not None else 0) | (HAS_MASK if includeMask else 0) | \
+        (SAFE_FIRST if board.safeTile is not None else 0)
+
+    out = bytearray()
+    out.append(flags)
+    for value in (board.LENGTH, board.HEIGHT, board.MINES):
+        writeVarint(out, value)
+    if flags & HAS_SEED:
+        writeVarint(out, board.seed)
+    if flags & HAS_MASK:
+        out += np.packbits(board.mines.reshape(-1)).tobytes()
+
+    writeVarint(out, len(moves))
+    previous = 0
+    for action, x, y in moves:
+        c = x * board.HEIGHT + y
+        writeVarint(out, zigzag(c - previous) << 2 | action)
+        previous = c
+
+    return bytes(out)
+
+
+def decodeGame(payload):
+    """
+    Unpacks encodeGame output into a fresh (unplayed) board and its list of (action, x, y) moves.
+    Raises ValueError on a truncated payload.
+    """
+
+    if not payload:
+        raise ValueError("truncated replay")
+
+    flags = payload[0]
+    length, pos = readVarint(payload, 1)
+    height, pos = readVarint(payload, pos)
+    mines, pos = readVarint(payload, pos)
+
+    board = Board(length, height, mines)
+    seed = None
+    if flags & HAS_SEED:
+        seed, pos = readVarint(payload, pos)
+
+    mask = None
+    if flags & HAS_MASK:
+        size = (length * height + 7) // 8
+        if pos + size > len(payload):
+            raise ValueError("truncated replay")
+        mask = np.unpackbits(np.frombuffer(payload, dtype=np.uint8, count=size, offset=pos), count=length * height)
+        pos += size
+
+    count, pos = readVarint(payload, pos)
+    moves = []
+    c = 0
+    for _ in range(count):
+        value, pos = readVarint(payload, pos)
+        c += unzigzag(value >> 2)
+        moves.append((value & 3, *divmod(c, height)))
+
+    if mask is not None:
+        board.load(mask.reshape(length, height).astype(bool))
+    else:
+        # the same seeded stream setup generates from, around the first reveal for first click safe boards
+        board.generate(seed, firstReveal(moves) if flags & SAFE_FIRST else None)
+    board.seed = seed
+
+    return board, moves
+
+
+class ReplayWriter:
+    """
+    Appends games to a replay file, each one a varint length followed by its encodeGame payload.
+    """
+
+    def __init__(self, path, includeMask=True):
+        self.includeMask = includeMask
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, 'ab')
+        if new:
+            self.file.write(MAGIC)
+
+    def write(self, board, moves):
+        payload = encodeGame(board, moves, self.includeMask)
+        size = bytearray()
+        writeVarint(size, len(payload))
+        self.file.write(bytes(size) + payload)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def readReplays(path):
+    """
+    Streams (board, moves) for every game of a replay file without loading the whole file.
+    """
+
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a replay file")
+
+        while True:
+            header = f.read(1)
+            if not header:
+                return
+
+            # the length varint, one byte at a time
+            size = shift = 0
+            byte = header
+            while True:
+                if not byte:
+                    raise ValueError(f"{path} is truncated")
+                size |= (byte[0] & 0x7f) << shift
+                if byte[0] < 0x80:
+                    break
+                shift += 7
+                byte = f.read(1)
+
+            payload = f.read(size)
+            if len(payload) < size:
+                raise ValueError(f"{path} is truncated")
+            yield decodeGame(payload)
+
+
+def play(board, moves):
+    """
+    Replays moves on a board headless, through the same click interface the gui and the solvers use.
+    """
+
+    for action, x, y in moves:
+        if action == REVEAL:
+            board.leftClicked(x, y)
+        elif action == FLAG:
+            board.rightClicked(x, y)
+        elif action == CHORD:
+            board.chordClicked(x, y)
+
+    return board
+
+
+class Recorder:
+    """
+    Sits between a solver and a game (a Board or the gui MinesweeperEnv) and records every click it forwards.
+    """
+
+    def __init__(self, game):
+        self.game = game
+        self.board = getattr(game, 'board', game)
+        self.moves = []
+
+    def leftClicked(self, x, y):
+        self.moves.append((REVEAL, x, y))
+        return self.game.leftClicked(x, y)
+
+    def rightClicked(self, x, y):
+        self.moves.append((FLAG, x, y))
+        return self.game.rightClicked(x, y)
+
+    def chordClicked(self, x, y):
+        self.moves.append((CHORD, x, y))
+        return self.game.chordClicked(x, y)
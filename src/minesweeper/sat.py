@@ -0,0 +1,177 @@
+from probability import BudgetExceeded, splitComponents
+
+# pysat is optional, the pure python search below is used without it
+try:
+    from pysat.card import CardEnc, EncType
+    from pysat.formula import IDPool
+    from pysat.solvers import Solver as SatSolver
+except ImportError:
+    SatSolver = None
+
+
+class PropagationSearch:
+    """
+    Pure python fallback for the sat backend.
+    Finds a model of exactly-k constraints with depth first search, propagating every constraint
+    whose free tiles must all be mines or all be safe before branching.
+    """
+
+    def __init__(self, constraints, nodeBudget):
+        self.tiles = sorted({c for cells, _ in constraints for c in cells})
+        index = {c: i for i, c in enumerate(self.tiles)}
+
+        self.cells = [[index[c] for c in cells] for cells, _ in constraints]
+        self.mines = [mines for _, mines in constraints]
+        self.members = [[] for _ in self.tiles]
+        for j, cells in enumerate(self.cells):
+            for i in cells:
+                self.members[i].append(j)
+
+        # shared by every solve call, so one question about the frontier stays bounded
+        self.nodeBudget = nodeBudget
+        self.nodes = 0
+
+    def propagate(self, values, queue):
+        while queue:
+            j = queue.pop()
+            free = [i for i in self.cells[j] if values[i] is None]
+            needs = self.mines[j] - sum(1 for i in self.cells[j] if values[i])
+            if needs < 0 or needs > len(free):
+                return False
+            if free and (needs == 0 or needs == len(free)):
+                for i in free:
+                    values[i] = needs > 0
+                    queue.extend(self.members[i])
+
+        return True
+
+    def solve(self, assumptions=()):
+        """
+        Returns a model (one value per tile) that satisfies every constraint and the assumptions,
+        None when there is none, and raises BudgetExceeded when the search gives up.
+        """
+
+        values = [None] * len(self.tiles)
+        queue = list(range(len(self.cells)))
+        for i, value in assumptions:
+            values[i] = value
+            queue.extend(self.members[i])
+
+        # depth first with an explicit stack, every entry is the values to propagate and the constraints to check;
+        # a branch shares its parent's values until it is taken off the stack
+        stack = [(values, queue, None, None)]
+        while stack:
+            values, queue, i, value = stack.pop()
+            if i is not None:
+                values = list(values)
+                values[i] = value
+
+            self.nodes += 1
+            if self.nodes > self.nodeBudget:
+                raise BudgetExceeded
+
+            if not self.propagate(values, queue):
+                continue
+
+            free = next((i for i, value in enumerate(values) if value is None), None)
+            if free is None:
+                return values
+
+            # safe is tried first
+            stack.append((values, list(self.members[free]), free, True))
+            stack.append((values, list(self.members[free]), free, False))
+
+        return None
+
+
+class SatBackend:
+    """
+    Decides which frontier tiles are forced safe or forced mines.
+    Every revealed number is an exactly-k constraint over its unknown neighbors (a pseudo boolean problem);
+    a tile is forced when no model exists with the tile flipped from a known model.
+    Uses pysat when it is installed and the pure python PropagationSearch otherwise; pysat gets nodeBudget
+    conflicts per component, the search nodeBudget nodes, and neither claims a tile it did not prove in time.
+    Only the frontier constraints are encoded, the global mine count is left to the probability engine.
+    """
+
+    def __init__(self, nodeBudget=100000, solverName='minisat22'):
+        self.nodeBudget = nodeBudget
+        self.solverName = solverName
+
+    def forced(self, constraints):
+        safe, mines = [], []
+        for component in splitComponents([(list(cells), count) for cells, count in constraints if cells]):
+            if SatSolver is not None:
+                componentSafe, componentMines = self.forcedPysat(component)
+            else:
+                componentSafe, componentMines = self.forcedSearch(component)
+            safe += componentSafe
+            mines += componentMines
+
+        return safe, mines
+
+    def forcedPysat(self, constraints):
+        tiles = sorted({c for cells, _ in constraints for c in cells})
+        index = {c: i + 1 for i, c in enumerate(tiles)}
+
+        pool = IDPool(start_from=len(tiles) + 1)
+        clauses = []
+        for cells, count in constraints:
+            clauses += CardEnc.equals(lits=[index[c] for c in cells], bound=count, vpool=pool,
+                                      encoding=EncType.seqcounter).clauses
+
+        with SatSolver(name=self.solverName, bootstrap_with=clauses) as solver:
+            # the conflicts of every call on this component count against one budget, None once it is spent
+            def solve(assumptions=()):
+                used = solver.accum_stats().get('conflicts', 0)
+                if used >= self.nodeBudget:
+                    return None
+                solver.conf_budget(self.nodeBudget - used)
+                return solver.solve_limited(assumptions=assumptions)
+
+            safe, mines = [], []
+            if not solve():
+                return safe, mines
+            model = solver.get_model()[:len(tiles)]
+
+            # tiles that differ between two models are not forced
+            candidates = set(range(len(tiles)))
+            while candidates:
+                i = candidates.pop()
+                result = solve([-model[i]])
+                if result is None:
+                    break
+                if result:
+                    other = solver.get_model()[:len(tiles)]
+                    candidates -= {k for k in candidates if other[k] != model[k]}
+                elif model[i] > 0:
+                    mines.append(tiles[i])
+                else:
+                    safe.append(tiles[i])
+
+        return safe, mines
+
+    def forcedSearch(self, constraints):
+        search = PropagationSearch(constraints, self.nodeBudget)
+        safe, mines = [], []
+
+        # a tile is only claimed with a proof, so running out of budget just stops the search
+        try:
+            model = search.solve()
+            if model is None:
+                return safe, mines
+
+            candidates = set(range(len(search.tiles)))
+            while candidates:
+                i = candidates.pop()
+                other = search.solve([(i, not model[i])])
+                if other is not None:
+                    candidates -= {k for k in candidates if other[k] != model[k]}
+                elif model[i]:
+                    mines.append(search.tiles[i])
+                else:
+                    safe.append(search.tiles[i])
+        except BudgetExceeded:
+            pass
+
+        return safe, mines
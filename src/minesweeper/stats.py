@@ -0,0 +1,71 @@
+import atexit
+import glob
+import json
+import os
+
+
+class StatsLog:
+    """
+    Append only game statistics, one json record per line.
+    Records are buffered and appended flushEvery at a time, so the cost per game stays constant.
+    Once the log grows past maxBytes it is renamed to the next numbered segment (statistics.00001.jsonl, ...)
+    and a new log is started; renames are atomic, so a crash never loses a written segment.
+    """
+
+    def __init__(self, path='statistics.jsonl', flushEvery=100, maxBytes=64 * 1024 * 1024):
+        self.path = path
+        self.flushEvery = flushEvery
+        self.maxBytes = maxBytes
+        self.buffer = []
+
+        atexit.register(self.flush)
+
+    def append(self, record):
+        self.buffer.append(json.dumps(record))
+        if len(self.buffer) >= self.flushEvery:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+
+        with open(self.path, 'a') as f:
+            f.write('\n'.join(self.buffer) + '\n')
+        self.buffer = []
+
+        if os.path.getsize(self.path) >= self.maxBytes:
+            self.rotate()
+
+    def rotate(self):
+        segments = logSegments(self.path)
+        stem, suffix = os.path.splitext(self.path)
+        index = int(os.path.splitext(segments[-1])[0].rsplit('.', 1)[-1]) + 1 if segments else 1
+
+        os.replace(self.path, f"{stem}.{index:05d}{suffix}")
+
+    def close(self):
+        self.flush()
+        atexit.unregister(self.flush)
+
+
+def logSegments(path):
+    stem, suffix = os.path.splitext(path)
+    return sorted(glob.glob(f"{glob.escape(stem)}.[0-9][0-9][0-9][0-9][0-9]{suffix}"))
+
+
+def readStats(path='statistics.jsonl'):
+    """
+    Streams every record of a log, oldest segment first.
+    A torn last line (from a crash mid write) is skipped.
+    """
+
+    for segment in logSegments(path) + [path]:
+        if not os.path.exists(segment):
+            continue
+
+        with open(segment) as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
@@ -0,0 +1,109 @@
+import numpy as np
+
+from env import LOST, PLAYING, WON, dilate, generateBoards, labelZeros
+
+
+class VecMinesweeperEnv:
+    """
+    B minesweeper boards stepped together for training, all state is kept in stacked (B, length, height) arrays.
+    Actions are flat tile indices (x * height + y), one per board, and always reveal.
+    Empty regions are labeled when a board is generated, so opening a region is a lookup instead of a flood fill.
+    Finished boards are replaced by new ones inside step, the returned observation is already the new board.
+    Every board keeps its state and safe tiles left like Board, and finished boards are announced once per step
+    to the subscribed listeners, as (board indices, won) arrays, before they are replaced.
+    """
+
+    # rewards
+    WIN = 1
+    LOSE = -1
+    PROGRESS = 0.3
+    NO_PROGRESS = -0.3
+
+    def __init__(self, numEnvs, length=16, height=16, mines=40, seed=None):
+        self.numEnvs = numEnvs
+        self.LENGTH = length
+        self.HEIGHT = height
+        self.MINES = mines
+        self.rng = np.random.default_rng(seed)
+
+        shape = (numEnvs, length, height)
+        self.mines = np.zeros(shape, dtype=bool)
+        self.numbers = np.zeros(shape, dtype=np.int8)
+        self.labels = np.zeros(shape, dtype=np.intp)
+        self.revealed = np.zeros(shape, dtype=bool)
+        self.state = np.full(numEnvs, PLAYING, dtype=np.int8)
+        self.safeRemaining = np.zeros(numEnvs, dtype=np.intp)
+        self.listeners = []
+
+    def generate(self, boards):
+        mines, numbers = generateBoards(boards.size, self.LENGTH, self.HEIGHT, self.MINES, self.rng)
+        labels, regions = labelZeros(numbers)
+
+        # labels local to each board, so the opened region table stays small
+        offsets = np.concatenate([[0], np.cumsum(regions)[:-1]])
+        labels = np.where(labels >= 0, labels - offsets[:, np.newaxis, np.newaxis], -1)
+
+        self.mines[boards] = mines
+        self.numbers[boards] = numbers
+        self.labels[boards] = labels
+        self.revealed[boards] = False
+        self.state[boards] = PLAYING
+        self.safeRemaining[boards] = self.LENGTH * self.HEIGHT - self.MINES
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+
+    def observe(self):
+        # -1 for hidden tiles, the number / 8 for revealed ones
+        return np.where(self.revealed, self.numbers / np.float32(8), np.float32(-1)).astype(np.float32)
+
+    def reset(self):
+        self.generate(np.arange(self.numEnvs))
+        return self.observe()
+
+    def step(self, actions):
+        """
+        Reveals one tile on every board.
+        Returns the rewards, the observations and which boards finished (and were reset), like the pong env.
+        """
+
+        actions = np.asarray(actions)
+        boards = np.arange(self.numEnvs)
+        revealed = self.revealed.reshape(self.numEnvs, -1)
+
+        already = revealed[boards, actions]
+        clicked = self.numbers.reshape(self.numEnvs, -1)[boards, actions]
+        lost = ~already & (clicked == -1)
+        revealed[boards, actions] = True
+        opened = (~already & ~lost).astype(np.intp)
+
+        # open the whole region (and its border) behind every empty tile clicked
+        empty = ~already & (clicked == 0)
+        if empty.any():
+            hit = boards[empty]
+            labels = self.labels[hit]
+            regions = np.zeros((hit.size, labels.max() + 1), dtype=bool)
+            regions[np.arange(hit.size), labels.reshape(hit.size, -1)[np.arange(hit.size), actions[hit]]] = True
+
+            region = np.take_along_axis(regions, np.maximum(labels, 0).reshape(hit.size, -1), axis=1)
+            region = dilate(region.reshape(labels.shape) & (labels >= 0)) & ~self.revealed[hit]
+            opened[hit] += np.count_nonzero(region, axis=(1, 2))
+            self.revealed[hit] |= region
+
+        self.safeRemaining -= opened
+
+        # one comparison over all boards decides which games ended
+        won = self.safeRemaining == 0
+        self.state = np.where(lost, LOST, np.where(won, WON, PLAYING)).astype(np.int8)
+
+        rewards = np.where(opened > 0, self.PROGRESS, self.NO_PROGRESS)
+        rewards = np.where(won, self.WIN, rewards)
+        rewards = np.where(lost, self.LOSE, rewards)
+
+        dones = self.state != PLAYING
+        if dones.any():
+            for listener in self.listeners:
+                listener(boards[dones], won[dones])
+            self.generate(boards[dones])
+
+        return rewards, self.observe(), dones
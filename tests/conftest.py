@@ -0,0 +1,7 @@
+import os
+import sys
+
+# the modules import their siblings by bare name, as they do when run from their own directory
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for directory in ('minesweeper', 'Pong'):
+    sys.path.insert(0, os.path.join(ROOT, 'src', directory))
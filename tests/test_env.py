@@ -0,0 +1,151 @@
+from collections import deque
+
+import numpy as np
+import pytest
+
+import env
+from env import ADJACENT_TILES, LOST, PLAYING, WON, Board, calcTBV, generateBoards
+
+
+def floodFillTBV(numbers):
+    # the 3bv count of the original gui: one per empty region flood filled with its border, one per unmarked number
+    length, height = numbers.shape
+    marked = numbers == -1
+    tbv = 0
+    for x in range(length):
+        for y in range(height):
+            if marked[x, y] or numbers[x, y] != 0:
+                continue
+            tbv += 1
+            marked[x, y] = True
+            queue = deque([(x, y)])
+            while queue:
+                i, j = queue.popleft()
+                for dx, dy in ADJACENT_TILES:
+                    if 0 <= i + dx < length and 0 <= j + dy < height and not marked[i + dx, j + dy]:
+                        marked[i + dx, j + dy] = True
+                        if numbers[i + dx, j + dy] == 0:
+                            queue.append((i + dx, j + dy))
+
+    return tbv + int(np.count_nonzero(~marked))
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_tbv_matches_flood_fill(seed):
+    rng = np.random.default_rng(seed)
+    length, height = rng.integers(1, 40, size=2)
+    mines = int(rng.integers(0, length * height))
+    _, numbers = generateBoards(20, length, height, mines, rng)
+
+    expected = [floodFillTBV(board) for board in numbers]
+
+    assert list(calcTBV(numbers)) == expected
+    assert [calcTBV(board) for board in numbers] == expected
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_large_board_opening_matches_flood_fill(seed, monkeypatch):
+    rng = np.random.default_rng(seed)
+    length, height = rng.integers(5, 30, size=2)
+    mines = int(rng.integers(1, length * height // 4))
+    board = Board(length, height, mines)
+    board.setup(seed)
+    clicks = [divmod(int(c), height) for c in rng.permutation(length * height)]
+
+    # the same layout opened by the flood fill and, with every board counting as large, by label and dilation
+    def asLarge(call, *args):
+        with monkeypatch.context() as patch:
+            patch.setattr(env, 'BLOCK', 0)
+            return call(*args)
+
+    small = Board(length, height, mines)
+    small.load(board.mines.copy())
+    large = Board(length, height, mines)
+    asLarge(large.load, board.mines.copy())
+
+    for x, y in clicks:
+        if small.state != PLAYING:
+            break
+        # flags are toggled along the way, on empty tiles too, so they cut regions on both paths
+        hidden = np.argwhere((small.numbers == 0) & ~small.revealed)
+        if rng.random() < 0.3 and len(hidden):
+            fx, fy = hidden[rng.integers(len(hidden))]
+            small.flag(fx, fy)
+            large.flag(fx, fy)
+        expected = small.reveal(x, y)
+        opened = asLarge(large.reveal, x, y)
+        assert sorted(map(tuple, np.asarray(opened).tolist())) == sorted(expected)
+        assert np.array_equal(large.revealed, small.revealed)
+        assert (large.revealedTBV, large.safeRemaining, large.state) == (small.revealedTBV, small.safeRemaining, small.state)
+
+
+def test_flag_cuts_large_board_region(monkeypatch):
+    # an empty corridor with a flagged column in the middle only opens up to the flags
+    mines = np.zeros((11, 7), dtype=bool)
+    mines[:, 0] = mines[:, 6] = True
+
+    def play(block):
+        with monkeypatch.context() as patch:
+            patch.setattr(env, 'BLOCK', block)
+            board = Board(11, 7, int(mines.sum()))
+            board.load(mines)
+            for y in range(2, 5):
+                board.flag(5, y)
+            opened = board.reveal(0, 3)
+            return len(opened), board.safeRemaining, board.revealed.copy()
+
+    small, large = play(env.BLOCK), play(0)
+    assert small[:2] == large[:2] == (27, 28)
+    assert np.array_equal(small[2], large[2])
+
+
+def cornerMine():
+    # a 5x5 board with one mine in the corner, (1, 1) is a 1 and the rest is one empty region with its border
+    mines = np.zeros((5, 5), dtype=bool)
+    mines[0, 0] = True
+    board = Board(5, 5, 1)
+    board.load(mines)
+    board.leftClicked(1, 1)
+    return board
+
+
+def test_chord_needs_matching_flags():
+    board = cornerMine()
+
+    assert board.chordClicked(1, 1) == []
+    board.rightClicked(0, 0)
+    board.rightClicked(0, 1)
+    assert board.chordClicked(1, 1) == []
+
+    assert board.revealed.sum() == 1
+    assert board.state == PLAYING
+
+
+def test_chord_opens_empty_region():
+    board = cornerMine()
+    board.rightClicked(0, 0)
+
+    opened = board.chordClicked(1, 1)
+
+    assert (2, 2) in opened
+    assert np.array_equal(board.revealed, ~board.mines)
+    assert board.state == WON
+    assert board.revealedTBV == board.tbv == 1
+
+
+def test_chord_with_wrong_flag_explodes():
+    board = cornerMine()
+    ends = []
+    board.subscribe(ends.append)
+    board.rightClicked(0, 1)
+
+    board.chordClicked(1, 1)
+    board.chordClicked(1, 1)
+
+    assert board.state == LOST
+    assert board.exploded == (0, 0)
+    assert board.revealed[0, 0] and not board.revealed[0, 1]
+    assert ends == [False]
+    assert (board.leftClicks, board.rightClicks, board.chordClicks) == (1, 1, 2)
+    assert board.efficiency() == pytest.approx(board.revealedTBV / 4)
+    assert board.revealedTBV == 1
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from pong_sim import BatchPongSim, PongSim
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_batch_matches_independent_games(seed):
+    rng = np.random.default_rng(seed)
+    envs = 8
+    batch = BatchPongSim(envs)
+    games = [PongSim() for _ in range(envs)]
+    states = batch.reset()
+    for i, game in enumerate(games):
+        assert np.allclose(states[i], game.reset())
+
+    misses = 0
+    for _ in range(2000):
+        actions = rng.integers(0, 3, size=envs)
+        rewards, states, dones = batch.step(actions)
+
+        for i, game in enumerate(games):
+            reward, state, done = game.step(actions[i])
+            # the batch resets finished games inside step, the single game is reset by its caller
+            if done:
+                state = game.reset()
+                misses += 1
+
+            assert done == dones[i]
+            assert reward == pytest.approx(rewards[i])
+            assert np.allclose(state, states[i])
+
+        assert list(batch.hit) == [game.hit for game in games]
+        assert list(batch.miss) == [game.miss for game in games]
+
+    assert misses > 0
@@ -0,0 +1,77 @@
+import itertools
+import random
+import time
+
+import pytest
+
+from probability import ProbabilityEngine
+
+
+def bruteForce(constraints, tiles, mines):
+    # mine probability of every tile over all layouts with exactly mines mines that meet the constraints
+    solutions = 0
+    hits = [0] * tiles
+    for layout in itertools.combinations(range(tiles), mines):
+        layout = set(layout)
+        if all(len(layout.intersection(cells)) == count for cells, count in constraints):
+            solutions += 1
+            for c in layout:
+                hits[c] += 1
+    return [h / solutions for h in hits]
+
+
+@pytest.mark.parametrize('seed', range(300))
+def test_matches_brute_force(seed):
+    rng = random.Random(seed)
+    tiles = rng.randint(4, 12)
+    truth = [rng.random() < 0.3 for _ in range(tiles)]
+
+    # constraints only cover part of the tiles, the rest are the unconstrained unknown tiles
+    constraints = []
+    for _ in range(rng.randint(1, 6)):
+        cells = rng.sample(range(max(1, tiles - 3)), rng.randint(1, min(4, max(1, tiles - 3))))
+        constraints.append((cells, sum(truth[c] for c in cells)))
+    mines = sum(truth)
+
+    probabilities, exact = ProbabilityEngine().calculate(constraints, set(range(tiles)), mines)
+
+    assert exact
+    assert probabilities == pytest.approx(dict(enumerate(bruteForce(constraints, tiles, mines))), abs=1e-12)
+
+
+def chain(n):
+    # n + 1 tiles in a row, every neighboring pair holds exactly one mine
+    return [([i, i + 1], 1) for i in range(n)]
+
+
+def test_long_chain_is_bounded():
+    engine = ProbabilityEngine()
+    constraints = chain(1200)
+
+    t = time.perf_counter()
+    probabilities, exact = engine.calculate(constraints, set(range(1201)), 600)
+
+    # too large to count exactly, the sampled answer still comes back quickly and without recursion
+    assert not exact
+    assert time.perf_counter() - t < 10
+    assert set(probabilities) == set(range(1201))
+
+
+def test_chain_below_the_tile_cap_is_exact():
+    probabilities, exact = ProbabilityEngine().calculate(chain(700), set(range(701)), 351)
+
+    # only the layout with mines on the even tiles has 351 mines
+    assert exact
+    assert [probabilities[c] for c in range(4)] == pytest.approx([1, 0, 1, 0])
+
+
+def test_sampling_fallback_is_close():
+    rng = random.Random(7)
+    truth = [rng.random() < 0.3 for _ in range(10)]
+    constraints = [(cells, sum(truth[c] for c in cells)) for cells in ([0, 1, 2], [2, 3, 4], [4, 5, 6], [1, 5, 7])]
+    mines = sum(truth)
+
+    probabilities, exact = ProbabilityEngine(samples=4000, seed=0, maxTiles=2).calculate(constraints, set(range(10)), mines)
+
+    assert not exact
+    assert probabilities == pytest.approx(dict(enumerate(bruteForce(constraints, 10, mines))), abs=0.1)
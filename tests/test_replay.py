@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from env import Board
+from agent import Solver
+from replay import MAGIC, Recorder, ReplayWriter, decodeGame, encodeGame, play, readReplays, writeVarint
+
+
+def recordGame(seed, firstClickSafe, chord):
+    board = Board(16, 30, 99, firstClickSafe)
+    board.setup(seed)
+    recorder = Recorder(board)
+    solver = Solver(recorder, flagMines=True, seed=seed, chord=chord)
+    solver.solve()
+    return board, recorder.moves
+
+
+def assertSameGame(replayed, board):
+    assert np.array_equal(replayed.mines, board.mines)
+    assert np.array_equal(replayed.revealed, board.revealed)
+    assert np.array_equal(replayed.flagged, board.flagged)
+    assert replayed.state == board.state
+    assert (replayed.leftClicks, replayed.rightClicks, replayed.chordClicks) == \
+        (board.leftClicks, board.rightClicks, board.chordClicks)
+
+
+@pytest.mark.parametrize('includeMask', [True, False])
+@pytest.mark.parametrize('firstClickSafe', [True, False])
+@pytest.mark.parametrize('seed', range(10))
+def test_round_trip(seed, firstClickSafe, includeMask):
+    board, moves = recordGame(seed, firstClickSafe, chord=seed % 2 == 1)
+
+    replayed, decoded = decodeGame(encodeGame(board, moves, includeMask))
+
+    assert decoded == [(action, int(x), int(y)) for action, x, y in moves]
+    assertSameGame(play(replayed, decoded), board)
+
+
+def test_mask_left_out_for_seeded_boards():
+    board, moves = recordGame(0, firstClickSafe=True, chord=False)
+
+    withMask = encodeGame(board, moves, includeMask=True)
+    withoutMask = encodeGame(board, moves, includeMask=False)
+
+    assert len(withMask) - len(withoutMask) == (board.LENGTH * board.HEIGHT + 7) // 8
+
+
+def test_replay_file(tmp_path):
+    path = tmp_path / 'games.msr'
+    games = [recordGame(seed, True, False) for seed in range(3)]
+    with ReplayWriter(path, includeMask=False) as writer:
+        for board, moves in games:
+            writer.write(board, moves)
+
+    for (board, _), (replayed, moves) in zip(games, readReplays(path)):
+        assertSameGame(play(replayed, moves), board)
+
+
+def test_truncated_file_raises_value_error(tmp_path):
+    board, moves = recordGame(1, True, False)
+    payload = encodeGame(board, moves, includeMask=False)
+    size = bytearray()
+    writeVarint(size, len(payload))
+    data = MAGIC + bytes(size) + payload
+
+    for cut in range(len(MAGIC) + 1, len(data)):
+        path = tmp_path / f'cut{cut}.msr'
+        path.write_bytes(data[:cut])
+        with pytest.raises(ValueError):
+            list(readReplays(path))
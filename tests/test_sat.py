@@ -0,0 +1,43 @@
+import itertools
+import random
+
+import pytest
+
+from sat import PropagationSearch, SatBackend
+
+
+def forcedBruteForce(constraints):
+    tiles = sorted({c for cells, _ in constraints for c in cells})
+    models = [dict(zip(tiles, bits)) for bits in itertools.product((0, 1), repeat=len(tiles))
+              if all(sum(dict(zip(tiles, bits))[c] for c in cells) == count for cells, count in constraints)]
+    safe = sorted(c for c in tiles if models and all(m[c] == 0 for m in models))
+    mines = sorted(c for c in tiles if models and all(m[c] == 1 for m in models))
+    return safe, mines
+
+
+@pytest.mark.parametrize('seed', range(100))
+def test_search_matches_brute_force(seed):
+    rng = random.Random(seed)
+    truth = [rng.random() < 0.35 for _ in range(10)]
+    constraints = [(cells, sum(truth[c] for c in cells))
+                   for cells in (rng.sample(range(10), rng.randint(1, 4)) for _ in range(rng.randint(1, 7)))]
+
+    safe, mines = SatBackend().forcedSearch(constraints)
+
+    assert (sorted(safe), sorted(mines)) == forcedBruteForce(constraints)
+
+
+def test_deep_search_does_not_recurse():
+    # 1500 separate pairs with one mine each, every pair takes a branch of its own
+    constraints = [([2 * i, 2 * i + 1], 1) for i in range(1500)]
+
+    model = PropagationSearch(constraints, 100000).solve()
+
+    assert all(model[2 * i] != model[2 * i + 1] for i in range(1500))
+
+
+def test_budget_stops_claims():
+    constraints = [([i, i + 1], 1) for i in range(2999)]
+
+    # every tile is undecided, running out of nodes must not claim any
+    assert SatBackend(nodeBudget=50).forcedSearch(constraints) == ([], [])